@@ -1,16 +1,16 @@
-import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import folium
+import streamlit as st
+import streamlit.components.v1 as components
 from streamlit_folium import st_folium
-from folium.plugins import MarkerCluster, HeatMap, Fullscreen, MiniMap, MeasureControl
-import xml.etree.ElementTree as ET
-from io import BytesIO
-import requests
 import time
 from datetime import datetime
 
+from solex import charts
+from solex import etl
+from solex import instrument
+from solex import snapshot
+from solex import workspace
+
 # ==============================================================================
 # 1. CONFIGURACIÓN INICIAL Y DE PÁGINA
 # ==============================================================================
@@ -27,9 +27,14 @@ st.set_page_config(
 )
 
 # --- VARIABLES DE ENTORNO Y CONSTANTES ---
-# AQUÍ ESTÁ EL ARREGLO: Apuntamos al archivo .txt que subiste
-URL_GITHUB_EXCEL = "https://raw.githubusercontent.com/ponsmartinluis-hub/reforestacion-pons/main/plantacion.xlsx"
-URL_GITHUB_KML = "https://raw.githubusercontent.com/ponsmartinluis-hub/reforestacion-pons/main/cerritodelcarmen.kml.txt"
+# Los orígenes de datos y KML de cada plantación viven en sites.json (ver
+# solex/workspace.py). Sin ese archivo se usa Cerrito del Carmen en GitHub.
+SITES_REGISTRY = workspace.load_registry()
+SUMMARY_SITE_ID = "__resumen__"
+
+# Instrumentación del rerun (solo con SOLEX_PROFILE=1); sin costo si está apagada.
+# `?dev=1` muestra el panel únicamente si la variable de entorno ya la activó.
+profiler = instrument.RerunProfiler(enabled=instrument.is_enabled())
 
 # ==============================================================================
 # 2. ESTILOS CSS AVANZADOS (CORPORATIVO & PREMIUM)
@@ -162,170 +167,84 @@ st.markdown("""
 # 3. LÓGICA DE NEGOCIO Y PROCESAMIENTO DE DATOS (ETL)
 # ==============================================================================
 
-def safe_float_convert(value):
-    """Intenta convertir a float de forma segura, retornando None si falla."""
-    try:
-        return float(value)
-    except (ValueError, TypeError):
-        return None
+# Las funciones puras viven en `solex.etl`; aquí solo se envuelven con el caché
+# de Streamlit y la notificación de errores en pantalla.
+safe_float_convert = etl.safe_float_convert
 
 @st.cache_data(ttl=300, show_spinner=False)
-def load_data_engine(source, is_url=False):
+def load_data_engine(source, is_url=False, _stage=None):
     """
     Motor principal de carga de datos.
     Soporta Excel (.xlsx) y CSV (.csv).
     Realiza limpieza profunda de nombres de columnas y tipos de datos.
     """
-    df = None
+    profiler.cache_miss('load_data_engine') # Solo se ejecuta si no hubo acierto
     try:
-        if is_url:
-            # Petición HTTP con timeout para evitar bloqueos
-            response = requests.get(source, timeout=10)
-            response.raise_for_status()
-            file_content = BytesIO(response.content)
-            df = pd.read_excel(file_content)
-        else:
-            # Carga local
-            if source.name.endswith('.csv'):
-                df = pd.read_csv(source)
-            else:
-                df = pd.read_excel(source)
-
-        if df is not None:
-            # 1. Limpieza de Cabeceras (Trim, Remove special chars)
-            df.columns = df.columns.str.strip().str.replace(r'[,.:]', '', regex=True)
-            
-            # 2. Eliminación de Duplicados (Columnas repetidas por error en Excel)
-            df = df.loc[:, ~df.columns.duplicated()]
-
-            # 3. Conversión de Tipos (Casteo explícito)
-            numeric_cols = ['Coordenada_X', 'Coordenada_Y', 'Altura_cm', 'Diametro_cm', 'Costo', 'Edad_Meses']
-            for col in numeric_cols:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-            
-            # 4. Formateo de Textos
-            if 'Estado_Salud' in df.columns:
-                df['Estado_Salud'] = df['Estado_Salud'].astype(str).str.strip().str.capitalize()
-            
-            if 'Tipo' in df.columns:
-                 df['Tipo'] = df['Tipo'].astype(str).str.strip()
+        return etl.load_data_engine(source, is_url=is_url, stage=_stage)
+    except Exception as e:
+        st.error(f"Error crítico en el motor de datos: {str(e)}")
+        return None
 
-            # 5. Validación de Coordenadas (Limpieza de ceros o nulos)
-            if 'Coordenada_X' in df.columns:
-                df = df[df['Coordenada_X'].notna()]
-                
-            return df
+@st.cache_resource(show_spinner=False)
+def get_site_cache(budget_mb):
+    """Caché LRU único para todas las sesiones y sitios, con presupuesto global."""
+    return workspace.SiteCache(budget_mb * 1024 * 1024)
 
+def load_site(site):
+    """Datos y zonas de un sitio registrado, con errores notificados en pantalla."""
+    cache = get_site_cache(SITES_REGISTRY['memory_budget_mb'])
+    try:
+        df = workspace.load_site_data(
+            site, cache, probe=profiler.cache_probe('sitio_datos'), stage=profiler.stage
+        )
     except Exception as e:
         st.error(f"Error crítico en el motor de datos: {str(e)}")
-        return None
+        return None, []
 
-@st.cache_data(ttl=600, show_spinner=False)
-def load_kml_raw_content(url):
-    """Descarga el contenido KML crudo desde GitHub."""
     try:
-        response = requests.get(url, timeout=10)
-        if response.status_code == 200:
-            return BytesIO(response.content)
-        else:
-            st.sidebar.error(f"Error HTTP {response.status_code} al descargar mapa.")
-            return None
+        zones = workspace.load_site_zones(
+            site, cache, on_warning=st.sidebar.warning,
+            probe=profiler.cache_probe('sitio_kml'), stage=profiler.stage
+        )
     except Exception as e:
         st.sidebar.error(f"Error de conexión KML: {e}")
-        return None
+        zones = []
+    return df, zones
+
+def load_all_aggregates():
+    """Agregados de cada sitio registrado para la vista resumen."""
+    cache = get_site_cache(SITES_REGISTRY['memory_budget_mb'])
+    aggs = {}
+    for site in SITES_REGISTRY['sites']:
+        try:
+            agg = workspace.load_site_aggregates(
+                site, cache, on_warning=st.sidebar.warning, probe=profiler.cache_probe('sitio_agregados')
+            )
+        except Exception as e:
+            st.warning(f"Sitio '{site['name']}' omitido del resumen: {e}")
+            continue
+        if agg is not None:
+            aggs[site['name']] = agg
+    return aggs
+
+def load_snapshot(site, df_raw, zones):
+    """Vista por defecto pre-renderizada del sitio (solex.snapshot), en el caché compartido."""
+    cache = get_site_cache(SITES_REGISTRY['memory_budget_mb'])
+    return snapshot.load_site_snapshot(
+        site, cache, df_raw, zones, probe=profiler.cache_probe('sitio_snapshot')
+    )
+
+def view_figure(view_snap, name, build):
+    """Figura del snapshot si la vista es la predeterminada; si no, `build()` en vivo."""
+    if view_snap is None:
+        return build()
+    return snapshot.figure_from_json(view_snap['figures'].get(name))
 
 def parse_kml_zones(kml_bytes):
-    """
-    Parser robusto para KML.
-    Maneja XML namespaces y busca coordenadas anidadas profundamente.
-    """
-    zonas = []
-    if kml_bytes is None:
-        return zonas
-    
-    try:
-        kml_bytes.seek(0)
-        content = kml_bytes.read()
-        
-        # Intentar decodificar con utf-8, fallback a latin-1
-        try:
-            xml_string = content.decode('utf-8')
-        except UnicodeDecodeError:
-            xml_string = content.decode('latin-1')
-            
-        root = ET.fromstring(xml_string)
-        
-        # Definir namespaces comunes (Google Earth usa kml 2.2)
-        namespaces = {
-            'k': 'http://www.opengis.net/kml/2.2',
-            'gx': 'http://www.google.com/kml/ext/2.2'
-        }
-        
-        # Búsqueda agnóstica de Placemarks (con y sin namespace)
-        placemarks = root.findall('.//k:Placemark', namespaces)
-        if not placemarks:
-            placemarks = root.findall('.//Placemark') # Intento sin namespace explícito
-            
-        for pm in placemarks:
-            # 1. Extraer Nombre
-            name_node = pm.find('.//k:name', namespaces)
-            if name_node is None: name_node = pm.find('.//name')
-            
-            zone_name = name_node.text if name_node is not None else "Zona Desconocida"
-            
-            # 2. Extraer Polígono (Coordinates)
-            coords_node = pm.find('.//k:coordinates', namespaces)
-            if coords_node is None: coords_node = pm.find('.//coordinates')
-            
-            if coords_node is not None and coords_node.text:
-                raw_coords = coords_node.text.strip().split()
-                points = []
-                for c in raw_coords:
-                    parts = c.split(',')
-                    if len(parts) >= 2:
-                        # IMPORTANTE: KML usa (Lon, Lat), Folium necesita (Lat, Lon)
-                        lon = float(parts[0])
-                        lat = float(parts[1])
-                        points.append([lat, lon])
-                
-                # Validar que sea un polígono (mínimo 3 puntos)
-                if len(points) > 2:
-                    zonas.append({'name': zone_name, 'points': points})
-                    
-    except ET.ParseError as e:
-        st.sidebar.warning(f"Error parseando XML del KML: {e}")
-    except Exception as e:
-        st.sidebar.warning(f"Error procesando zonas KML: {e}")
-        
-    return zonas
+    """Parser robusto para KML (ver `solex.etl.parse_kml_zones`)."""
+    return etl.parse_kml_zones(kml_bytes, on_warning=st.sidebar.warning)
 
-def generate_text_report(df):
-    """Genera un reporte narrativo basado en los datos actuales."""
-    if df is None or df.empty: return "No hay datos disponibles para generar el reporte."
-    
-    total = len(df)
-    zonas = df['Poligono'].nunique() if 'Poligono' in df.columns else 0
-    especies = df['Tipo'].nunique() if 'Tipo' in df.columns else 0
-    
-    # Salud
-    salud_txt = "datos no disponibles"
-    if 'Estado_Salud' in df.columns:
-        salud_counts = df['Estado_Salud'].value_counts()
-        top_salud = salud_counts.idxmax()
-        pct_top = (salud_counts.max() / total) * 100
-        salud_txt = f"El estado predominante es **{top_salud}** ({pct_top:.1f}%)."
-
-    report = f"""
-    **RESUMEN EJECUTIVO AUTOMATIZADO**
-    
-    A fecha de **{datetime.now().strftime('%d/%m/%Y')}**, el proyecto "Cerrito del Carmen" gestiona un inventario biológico de **{total:,.0f} especímenes**.
-    La reforestación se distribuye a lo largo de **{zonas} zonas geográficas** (polígonos), integrando una biodiversidad de **{especies} especies distintas**.
-    
-    **Análisis Fitosanitario:**
-    {salud_txt}
-    """
-    return report
+generate_text_report = etl.generate_text_report
 
 # ==============================================================================
 # 4. BARRA LATERAL (SIDEBAR) Y CONTROLES
@@ -348,12 +267,21 @@ with st.sidebar:
     data_source = None
     kml_source = None
     is_url_flag = False
+    active_site = None
+    selected_site_id = None
     
     if conn_mode == "Nube GitHub (Auto)":
-        data_source = URL_GITHUB_EXCEL
-        # Intentamos cargar el KML automáticamente desde la URL corregida
-        kml_content_bytes = load_kml_raw_content(URL_GITHUB_KML)
-        is_url_flag = True
+        # Selector de plantación (registro sites.json)
+        site_names = {s['id']: s['name'] for s in SITES_REGISTRY['sites']}
+        site_options = list(site_names)
+        if len(site_options) > 1:
+            site_options.append(SUMMARY_SITE_ID)
+        selected_site_id = st.selectbox(
+            "Sitio:",
+            site_options,
+            format_func=lambda sid: site_names.get(sid, "🌎 Resumen Multi-sitio")
+        )
+        active_site = next((s for s in SITES_REGISTRY['sites'] if s['id'] == selected_site_id), None)
         st.success("🟢 Sistema Online")
         st.caption("Sincronizando con repositorio...")
     else:
@@ -380,71 +308,132 @@ with st.sidebar:
     st.caption("**Versión:** 6.0.2 LTS")
     st.caption("**Cliente:** SOLEX Secure")
     st.caption("**Dev:** Pons & Gemini")
+    cache_caption = st.empty() # Se completa tras la carga de datos
 
 # ==============================================================================
 # 5. CARGA Y PROCESAMIENTO PRINCIPAL
 # ==============================================================================
 
-if data_source:
+df_raw = None
+map_zones = []
+site_aggs = {}
+site_name = active_site['name'] if active_site else None
+site_key = active_site['id'] if active_site else None
+
+if selected_site_id == SUMMARY_SITE_ID:
+    with st.spinner("Consolidando sitios..."):
+        # Solo agregados por sitio: nunca se concatenan los DataFrames crudos
+        site_aggs = load_all_aggregates()
+elif active_site:
+    with st.spinner("Procesando ecosistema de datos..."):
+        df_raw, map_zones = load_site(active_site)
+elif data_source:
+    site_name = site_key = data_source.name.rsplit('.', 1)[0]
     with st.spinner("Procesando ecosistema de datos..."):
         # Carga de Datos Tabulares
-        df_raw = load_data_engine(data_source, is_url=is_url_flag)
+        with profiler.cache_lookup('load_data_engine'):
+            df_raw = load_data_engine(data_source, is_url=is_url_flag, _stage=profiler.stage)
         
         # Procesamiento de Mapa (Polígonos)
         map_zones = []
         if kml_content_bytes:
-            map_zones = parse_kml_zones(kml_content_bytes)
-else:
-    df_raw = None
+            with profiler.stage('parseo_kml'):
+                map_zones = parse_kml_zones(kml_content_bytes)
+
+# Snapshot de la vista por defecto: se construye una vez por versión del dataset,
+# solo para sitios del registro (los archivos subidos no se guardan en disco)
+snap = None
+view_snap = None
+if active_site and df_raw is not None and snapshot.is_enabled():
+    with st.spinner("Pre-renderizando vista general..."), profiler.stage('snapshot'):
+        try:
+            snap = load_snapshot(active_site, df_raw, map_zones)
+        except Exception as e:
+            st.sidebar.warning(f"Vista pre-renderizada no disponible: {e}")
+
+cache_stats = get_site_cache(SITES_REGISTRY['memory_budget_mb']).stats()
+cache_caption.caption(f"**Caché:** {cache_stats['used_bytes'] / 1024**2:.2f} / {cache_stats['budget_bytes'] / 1024**2:.0f} MB")
 
 # ==============================================================================
 # 6. DASHBOARD INTERACTIVO
 # ==============================================================================
 
-if df_raw is not None:
+if selected_site_id == SUMMARY_SITE_ID:
+    
+    # --------------------------------------------------------------------------
+    # VISTA RESUMEN MULTI-SITIO (A PARTIR DE AGREGADOS)
+    # --------------------------------------------------------------------------
+    st.title("🌎 Resumen Multi-sitio")
+    st.markdown("**Consolidado de todas las plantaciones registradas**")
+    
+    if site_aggs:
+        summary_df, summary_kpis, health_counts = workspace.combine_aggregates(site_aggs)
+        
+        col_kpi1, col_kpi2, col_kpi3, col_kpi4 = st.columns(4)
+        col_kpi1.metric("Inventario Total", f"{summary_kpis['total_trees']:,.0f}", delta=f"{len(site_aggs)} Sitios")
+        col_kpi2.metric("Índice de Supervivencia", f"{summary_kpis['salud_pct']:.1f}%", delta="Meta > 90%", delta_color="normal")
+        col_kpi3.metric("Altura Promedio", f"{summary_kpis['avg_height']:.1f} cm", delta="Ponderada")
+        col_kpi4.metric("Zonas Activas", f"{summary_kpis['n_zones']} Polígonos")
+        
+        col_s1, col_s2 = st.columns([2, 1])
+        with col_s1:
+            st.plotly_chart(charts.build_sites_bar(summary_df), use_container_width=True)
+        with col_s2:
+            if health_counts:
+                st.plotly_chart(charts.build_health_pie_from_counts(health_counts), use_container_width=True)
+        
+        st.dataframe(
+            summary_df,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "Supervivencia_%": st.column_config.NumberColumn("Supervivencia", format="%.1f%%"),
+                "Altura_Promedio_cm": st.column_config.NumberColumn("Altura Promedio", format="%.1f cm"),
+            }
+        )
+    else:
+        st.warning("No fue posible cargar ningún sitio del registro.")
+
+elif df_raw is not None:
     
     # --- RENDERIZADO DE FILTROS DINÁMICOS ---
+    available_species, available_zones = snapshot.filter_options(df_raw)
     with filter_container:
         # Filtro de Especies
         if 'Tipo' in df_raw.columns:
-            available_species = sorted(df_raw['Tipo'].astype(str).unique())
             selected_species = st.multiselect("Especies:", available_species, default=available_species)
         else:
             selected_species = []
             
         # Filtro de Polígonos
         if 'Poligono' in df_raw.columns:
-            available_zones = sorted(df_raw['Poligono'].astype(str).unique())
             selected_zones = st.multiselect("Zonas:", available_zones, default=available_zones)
         else:
             selected_zones = []
 
     # --- APLICACIÓN DE FILTROS AL DATAFRAME ---
-    df = df_raw.copy()
-    if selected_species and 'Tipo' in df.columns:
-        df = df[df['Tipo'].isin(selected_species)]
-    if selected_zones and 'Poligono' in df.columns:
-        df = df[df['Poligono'].isin(selected_zones)]
+    # Vista por defecto (todas las especies y zonas): no se copia el DataFrame y
+    # se sirve el snapshot. Cada pestaña vuelve al cálculo en vivo en cuanto se
+    # cambia uno de sus widgets.
+    is_default_filter = set(selected_species) == set(available_species) and set(selected_zones) == set(available_zones)
+    view_snap = snap if is_default_filter else None
+    with profiler.stage('filtro'):
+        df = df_raw if is_default_filter else etl.apply_filters(df_raw, selected_species, selected_zones)
 
     # --- CABECERA PRINCIPAL ---
-    st.title("🌵 Monitor de Reforestación: Cerrito del Carmen")
+    st.title(f"🌵 Monitor de Reforestación: {site_name}")
     st.markdown("**Plataforma Integral de Gestión Biológica y Financiera**")
+    if view_snap is not None:
+        st.caption(f"⚡ Vista pre-renderizada · versión {view_snap['version']} · {view_snap['created']}")
 
     # --- INDICADORES CLAVE (KPIs) ---
     col_kpi1, col_kpi2, col_kpi3, col_kpi4 = st.columns(4)
     
-    total_trees = len(df)
-    
-    # Cálculo seguro de Salud
-    salud_pct = 0
-    if 'Estado_Salud' in df.columns:
-        good_health = df['Estado_Salud'].str.contains('Excelente|Bueno', case=False, na=False).sum()
-        salud_pct = (good_health / total_trees * 100) if total_trees > 0 else 0
-        
-    # Cálculo seguro de Altura
-    avg_height = 0
-    if 'Altura_cm' in df.columns:
-        avg_height = df['Altura_cm'].mean()
+    with profiler.stage('kpis'):
+        kpis = view_snap['kpis'] if view_snap is not None else charts.compute_kpis(df, map_zones)
+    total_trees = kpis['total_trees']
+    salud_pct = kpis['salud_pct']
+    avg_height = kpis['avg_height']
 
     col_kpi1.metric("Inventario Total", f"{total_trees:,.0f}", delta="Especímenes")
     col_kpi2.metric("Índice de Supervivencia", f"{salud_pct:.1f}%", delta="Meta > 90%", delta_color="normal")
@@ -468,43 +457,37 @@ if df_raw is not None:
         
         with col_d1:
             st.subheader("Distribución Jerárquica del Ecosistema")
-            if 'Poligono' in df.columns and 'Tipo' in df.columns:
-                path_cols = ['Poligono', 'Tipo']
-                if 'Estado_Salud' in df.columns: path_cols.append('Estado_Salud')
-                
-                fig_sun = px.sunburst(
-                    df, 
-                    path=path_cols,
-                    title="Niveles: Zona > Especie > Estado (Interactivo)",
-                    color_discrete_sequence=px.colors.qualitative.Prism,
-                    height=500
-                )
-                st.plotly_chart(fig_sun, use_container_width=True)
+            with profiler.stage('sunburst'):
+                fig_sun = view_figure(view_snap, 'sunburst', lambda: charts.build_sunburst(df))
+            if fig_sun is not None:
+                with profiler.stage('sunburst_render'):
+                    st.plotly_chart(fig_sun, use_container_width=True)
+                profiler.payload_figure('sunburst', fig_sun)
             else:
                 st.info("Faltan columnas 'Poligono' o 'Tipo' para generar el gráfico jerárquico.")
 
         with col_d2:
             st.subheader("Estado Fitosanitario Global")
-            if 'Estado_Salud' in df.columns:
-                fig_pie = px.pie(
-                    df, 
-                    names='Estado_Salud', 
-                    hole=0.5,
-                    title="Proporción de Salud",
-                    color_discrete_sequence=px.colors.sequential.Greens_r
-                )
-                fig_pie.update_traces(textposition='inside', textinfo='percent+label')
-                fig_pie.update_layout(showlegend=False)
-                st.plotly_chart(fig_pie, use_container_width=True)
+            with profiler.stage('salud'):
+                fig_pie = view_figure(view_snap, 'salud', lambda: charts.build_health_pie(df))
+            if fig_pie is not None:
+                with profiler.stage('salud_render'):
+                    st.plotly_chart(fig_pie, use_container_width=True)
+                profiler.payload_figure('salud', fig_pie)
                 
                 # Tabla Resumen
                 st.markdown("##### Detalle Numérico")
-                summary_table = df['Estado_Salud'].value_counts().reset_index()
-                summary_table.columns = ['Estado', 'Cantidad']
+                if view_snap is not None and view_snap['health_table'] is not None:
+                    summary_table = pd.DataFrame(view_snap['health_table'])
+                else:
+                    summary_table = charts.health_summary_table(df)
                 st.dataframe(summary_table, use_container_width=True, hide_index=True)
         
         st.divider()
-        st.info(generate_text_report(df))
+        if view_snap is not None:
+            st.info(etl.format_text_report(view_snap['report'], project_name=site_name))
+        else:
+            st.info(generate_text_report(df, project_name=site_name))
 
     # --------------------------------------------------------------------------
     # TAB 2: MAPA INTELIGENTE (POLÍGONOS + PUNTOS)
@@ -516,9 +499,10 @@ if df_raw is not None:
         
         with c_map_controls:
             st.markdown("### Capas")
-            show_polys = st.toggle("Mostrar Zonas (Polígonos)", value=True)
-            show_heat = st.toggle("Mapa de Calor", value=False)
-            show_clusters = st.toggle("Agrupar Puntos (Clusters)", value=True)
+            show_polys = st.toggle("Mostrar Zonas (Polígonos)", value=charts.MAP_LAYER_DEFAULTS['show_polys'])
+            show_heat = st.toggle("Mapa de Calor", value=charts.MAP_LAYER_DEFAULTS['show_heat'])
+            show_clusters = st.toggle("Agrupar Puntos (Clusters)", value=charts.MAP_LAYER_DEFAULTS['show_clusters'])
+            map_layers = {'show_polys': show_polys, 'show_heat': show_heat, 'show_clusters': show_clusters}
             
             st.markdown("### Leyenda")
             st.markdown("🟢 **Excelente**")
@@ -531,73 +515,18 @@ if df_raw is not None:
                 st.warning("⚠️ No se detectaron zonas en el KML.")
 
         with c_map_view:
-            if 'Coordenada_X' in df.columns and 'Coordenada_Y' in df.columns:
-                # Centro dinámico del mapa
-                lat_center = df['Coordenada_X'].mean() if not df.empty else 21.23
-                lon_center = df['Coordenada_Y'].mean() if not df.empty else -100.46
-                
-                m = folium.Map(location=[lat_center, lon_center], zoom_start=17, tiles="OpenStreetMap")
-                
-                # Plugins de Folium
-                Fullscreen().add_to(m)
-                MeasureControl(position='topright').add_to(m)
-                MiniMap(toggle_display=True).add_to(m)
-                
-                # 1. CAPA DE POLÍGONOS (ZONAS KML)
-                if show_polys and map_zones:
-                    colors_poly = ['#3388ff', '#ff33bb', '#33ff57', '#ff9933', '#6600cc']
-                    for i, zone in enumerate(map_zones):
-                        c = colors_poly[i % len(colors_poly)]
-                        folium.Polygon(
-                            locations=zone['points'],
-                            tooltip=zone['name'],
-                            popup=f"<b>Zona:</b> {zone['name']}",
-                            color=c,
-                            fill=True,
-                            fill_opacity=0.15,
-                            weight=2
-                        ).add_to(m)
-
-                # 2. CAPA DE MAPA DE CALOR
-                df_geo = df.dropna(subset=['Coordenada_X', 'Coordenada_Y'])
-                if show_heat and not df_geo.empty:
-                    heat_data = [[row['Coordenada_X'], row['Coordenada_Y']] for idx, row in df_geo.iterrows()]
-                    HeatMap(heat_data, radius=15, blur=10).add_to(m)
-
-                # 3. CAPA DE PUNTOS (CLUSTER O INDIVIDUAL)
-                marker_group = MarkerCluster().add_to(m) if show_clusters else m
-                
-                for _, row in df_geo.iterrows():
-                    # Lógica de Color
-                    status = str(row.get('Estado_Salud', '')).lower()
-                    if 'crítico' in status or 'muerto' in status:
-                        icon_color = 'red'
-                        icon_icon = 'times'
-                    elif 'regular' in status or 'estrés' in status:
-                        icon_color = 'orange'
-                        icon_icon = 'exclamation'
-                    else:
-                        icon_color = 'green'
-                        icon_icon = 'leaf'
-                        
-                    html_popup = f"""
-                    <div style='font-family:sans-serif; min-width:120px'>
-                        <h5 style='margin:0'>{row.get('ID_Especimen','ID')}</h5>
-                        <hr style='margin:5px 0'>
-                        <b>Tipo:</b> {row.get('Tipo','-')}<br>
-                        <b>Salud:</b> {row.get('Estado_Salud','-')}<br>
-                        <b>Zona:</b> {row.get('Poligono','-')}
-                    </div>
-                    """
-                    
-                    folium.Marker(
-                        location=[row['Coordenada_X'], row['Coordenada_Y']],
-                        popup=folium.Popup(html_popup, max_width=200),
-                        tooltip=f"{row.get('Tipo')}",
-                        icon=folium.Icon(color=icon_color, icon=icon_icon, prefix='fa')
-                    ).add_to(marker_group)
-
-                st_folium(m, width="100%", height=650)
+            if charts.has_coordinates(df):
+                if view_snap is not None and view_snap['map_html'] and map_layers == charts.MAP_LAYER_DEFAULTS:
+                    # HTML estático del snapshot: sin reconstruir marcadores
+                    with profiler.stage('mapa_render'):
+                        components.html(view_snap['map_html'], height=650)
+                    profiler.payload('mapa', len(view_snap['map_html']))
+                else:
+                    with profiler.stage('mapa'):
+                        m = charts.build_map(df, map_zones, **map_layers)
+                    with profiler.stage('mapa_render'):
+                        st_folium(m, width="100%", height=650)
+                    profiler.payload_map('mapa', m)
             else:
                 st.error("No se encontraron columnas de coordenadas (Coordenada_X, Coordenada_Y) en el Excel.")
 
@@ -607,53 +536,40 @@ if df_raw is not None:
     with tab_bio:
         st.subheader("Análisis Biométrico de Crecimiento")
         
-        if 'Altura_cm' in df.columns and 'Diametro_cm' in df.columns:
+        if charts.has_biometrics(df):
             col_b1, col_b2 = st.columns([3, 1])
             
             with col_b1:
                 # --- VERIFICACIÓN DE LIBRERÍA DE TENDENCIAS ---
-                trend_mode = None
-                try:
-                    import statsmodels
-                    trend_mode = "ols"
-                except ImportError:
-                    trend_mode = None
+                trend_mode = charts.detect_trendline()
+                if trend_mode is None:
                     # Notificación discreta
                     if 'stats_warn' not in st.session_state:
                         st.toast("Librería 'statsmodels' no instalada. Tendencias desactivadas.", icon="ℹ️")
                         st.session_state['stats_warn'] = True
                 
-                fig_scatter = px.scatter(
-                    df, 
-                    x='Diametro_cm', 
-                    y='Altura_cm',
-                    color='Tipo' if 'Tipo' in df.columns else None,
-                    size='Altura_cm',
-                    hover_data=df.columns,
-                    trendline=trend_mode,
-                    title="Relación Alométrica: Diámetro vs Altura",
-                    labels={'Diametro_cm': 'Diámetro de Tallo (cm)', 'Altura_cm': 'Altura Total (cm)'}
-                )
-                st.plotly_chart(fig_scatter, use_container_width=True)
+                with profiler.stage('alometria'):
+                    fig_scatter = view_figure(view_snap, 'alometria', lambda: charts.build_scatter(df, trend_mode))
+                with profiler.stage('alometria_render'):
+                    st.plotly_chart(fig_scatter, use_container_width=True)
+                profiler.payload_figure('alometria', fig_scatter)
             
             with col_b2:
                 st.markdown("#### Estadísticas Rápidas")
-                desc = df[['Altura_cm', 'Diametro_cm']].describe()
+                if view_snap is not None and view_snap['bio_stats'] is not None:
+                    desc = pd.DataFrame(view_snap['bio_stats'])
+                else:
+                    desc = df[['Altura_cm', 'Diametro_cm']].describe()
                 st.dataframe(desc, use_container_width=True)
                 
             st.divider()
             
             # Histograma de Distribución
-            fig_hist = px.histogram(
-                df, 
-                x='Altura_cm', 
-                color='Tipo' if 'Tipo' in df.columns else None,
-                nbins=30,
-                title="Distribución de Tamaños en la Plantación",
-                marginal="box", # Muestra boxplot arriba
-                opacity=0.7
-            )
-            st.plotly_chart(fig_hist, use_container_width=True)
+            with profiler.stage('distribucion'):
+                fig_hist = view_figure(view_snap, 'distribucion', lambda: charts.build_histogram(df))
+            with profiler.stage('distribucion_render'):
+                st.plotly_chart(fig_hist, use_container_width=True)
+            profiler.payload_figure('distribucion', fig_hist)
         else:
             st.warning("Se requieren columnas numéricas 'Altura_cm' y 'Diametro_cm' para este análisis.")
 
@@ -669,22 +585,19 @@ if df_raw is not None:
         with col_input:
             with st.expander("⚙️ Parámetros del Modelo", expanded=True):
                 st.markdown("**Costos (Output)**")
-                cost_plant = st.number_input("Costo Plantación ($/u)", 60.0, step=5.0)
-                cost_maint = st.number_input("Mantenimiento Anual ($/u)", 25.0, step=5.0)
+                cost_plant = st.number_input("Costo Plantación ($/u)", charts.ROI_DEFAULTS['cost_plant'], step=5.0)
+                cost_maint = st.number_input("Mantenimiento Anual ($/u)", charts.ROI_DEFAULTS['cost_maint'], step=5.0)
                 
                 st.markdown("**Ingresos (Input)**")
-                price_sale = st.number_input("Precio Venta ($/u)", 950.0, step=50.0)
-                years = st.slider("Años a Cosecha", 4, 12, 7)
-                risk_pct = st.slider("Riesgo/Merma (%)", 0, 50, 15) / 100
+                price_sale = st.number_input("Precio Venta ($/u)", charts.ROI_DEFAULTS['price_sale'], step=50.0)
+                years = st.slider("Años a Cosecha", 4, 12, charts.ROI_DEFAULTS['years'])
+                risk_pct = st.slider("Riesgo/Merma (%)", 0, 50, int(charts.ROI_DEFAULTS['risk_pct'] * 100)) / 100
+                roi_params = {'cost_plant': cost_plant, 'cost_maint': cost_maint, 'price_sale': price_sale, 'years': years, 'risk_pct': risk_pct}
         
         with col_graph:
             # Identificar plantas productivas
-            if 'Tipo' in df.columns:
-                # Busca palabras clave
-                mask_prod = df['Tipo'].str.contains("Maguey|Agave|Mezquite", case=False, na=False)
-                df_prod = df[mask_prod]
-                n_plants = len(df_prod)
-                
+            n_plants = charts.count_productive(df)
+            if n_plants is not None:
                 if n_plants > 0:
                     st.success(f"Modelo aplicado a **{n_plants}** unidades productivas.")
                 else:
@@ -695,15 +608,11 @@ if df_raw is not None:
             
             if n_plants > 0:
                 # Cálculos
-                capex = n_plants * cost_plant
-                opex = n_plants * cost_maint * years
-                total_cost = capex + opex
-                
-                final_plants = n_plants * (1 - risk_pct)
-                revenue = final_plants * price_sale
-                
-                profit = revenue - total_cost
-                roi = (profit / total_cost) * 100 if total_cost > 0 else 0
+                roi_model = charts.compute_roi(n_plants, **roi_params)
+                total_cost = roi_model['total_cost']
+                revenue = roi_model['revenue']
+                profit = roi_model['profit']
+                roi = roi_model['roi']
                 
                 # Métricas Financieras
                 m1, m2, m3 = st.columns(3)
@@ -712,20 +621,12 @@ if df_raw is not None:
                 m3.metric("Utilidad Neta", f"${profit:,.0f}", delta=f"ROI: {roi:.1f}%")
                 
                 # Gráfico Waterfall (Cascada)
-                fig_water = go.Figure(go.Waterfall(
-                    orientation = "v",
-                    measure = ["relative", "relative", "total", "relative", "total"],
-                    x = ["Inversión Inicial", "Mantenimiento", "Costo Acumulado", "Venta Cosecha", "Ganancia Final"],
-                    textposition = "outside",
-                    text = [f"-{capex/1000:.0f}k", f"-{opex/1000:.0f}k", "", f"+{revenue/1000:.0f}k", f"{profit/1000:.0f}k"],
-                    y = [-capex, -opex, 0, revenue, 0],
-                    connector = {"line":{"color":"rgb(63, 63, 63)"}},
-                    decreasing = {"marker":{"color":"#ef5350"}},
-                    increasing = {"marker":{"color":"#66bb6a"}},
-                    totals = {"marker":{"color":"#42a5f5"}}
-                ))
-                fig_water.update_layout(title="Flujo de Caja del Proyecto", height=450)
-                st.plotly_chart(fig_water, use_container_width=True)
+                with profiler.stage('roi'):
+                    roi_snap = view_snap if roi_params == charts.ROI_DEFAULTS else None
+                    fig_water = view_figure(roi_snap, 'roi', lambda: charts.build_waterfall(roi_model))
+                with profiler.stage('roi_render'):
+                    st.plotly_chart(fig_water, use_container_width=True)
+                profiler.payload_figure('roi', fig_water)
 
     # --------------------------------------------------------------------------
     # TAB 5: EDITOR DE DATOS Y DESCARGA
@@ -734,45 +635,54 @@ if df_raw is not None:
         st.subheader("📝 Gestión de Base de Datos")
         st.markdown("Edición en tiempo real para correcciones rápidas. Los cambios son temporales en esta sesión.")
         
-        # Editor Interactivo
-        df_editor = st.data_editor(
-            df,
-            num_rows="dynamic",
-            use_container_width=True,
-            column_config={
-                "Estado_Salud": st.column_config.SelectboxColumn(
-                    "Salud",
-                    options=["Excelente", "Bueno", "Regular", "Estrés Hídrico", "Plaga", "Crítico", "Muerto"],
-                    required=True
-                ),
-                "Altura_cm": st.column_config.NumberColumn(
-                    "Altura",
-                    min_value=0,
-                    max_value=2000,
-                    format="%.0f cm"
-                ),
-                "Coordenada_X": st.column_config.NumberColumn("Latitud", format="%.6f"),
-                "Coordenada_Y": st.column_config.NumberColumn("Longitud", format="%.6f"),
-            },
-            height=500
-        )
+        # Editor Interactivo. En la vista pre-renderizada se abre a pedido: serializar
+        # todo el inventario al navegador es el mayor costo de cada visita.
+        df_editor = None
+        if view_snap is None or st.toggle("✏️ Abrir editor de registros", value=False, key="abrir_editor"):
+            with profiler.stage('editor'):
+                df_editor = st.data_editor(
+                    df,
+                    num_rows="dynamic",
+                    use_container_width=True,
+                    column_config={
+                        "Estado_Salud": st.column_config.SelectboxColumn(
+                            "Salud",
+                            options=["Excelente", "Bueno", "Regular", "Estrés Hídrico", "Plaga", "Crítico", "Muerto"],
+                            required=True
+                        ),
+                        "Altura_cm": st.column_config.NumberColumn(
+                            "Altura",
+                            min_value=0,
+                            max_value=2000,
+                            format="%.0f cm"
+                        ),
+                        "Coordenada_X": st.column_config.NumberColumn("Latitud", format="%.6f"),
+                        "Coordenada_Y": st.column_config.NumberColumn("Longitud", format="%.6f"),
+                    },
+                    height=500
+                )
         
         st.divider()
         
         col_down1, col_down2 = st.columns([3, 1])
         with col_down1:
-            st.caption(f"Mostrando {len(df_editor)} registros. Usa el botón de descarga para guardar cambios.")
+            if df_editor is not None:
+                st.caption(f"Mostrando {len(df_editor)} registros. Usa el botón de descarga para guardar cambios.")
+            else:
+                st.caption(f"{len(df):,} registros. Abre el editor para corregirlos antes de descargar.")
         
         with col_down2:
             # Generador de Excel
-            buffer = BytesIO()
-            with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
-                df_editor.to_excel(writer, index=False, sheet_name='Plantacion_Editada')
-            
+            with profiler.stage('export_xlsx'):
+                if view_snap is not None and (df_editor is None or df_editor.equals(df)):
+                    xlsx_bytes = view_snap['xlsx'] # Sin ediciones: el .xlsx ya está pre-renderizado
+                else:
+                    xlsx_bytes = charts.export_xlsx(df_editor)
+            profiler.payload('export_xlsx', len(xlsx_bytes))
             st.download_button(
                 label="📥 Descargar Excel",
-                data=buffer.getvalue(),
-                file_name=f"Plantacion_Cerrito_{datetime.now().strftime('%Y%m%d')}.xlsx",
+                data=xlsx_bytes,
+                file_name=f"Plantacion_{site_key}_{datetime.now().strftime('%Y%m%d')}.xlsx",
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                 type="primary"
             )
@@ -786,3 +696,35 @@ else:
         <p style='color:gray; font-size:0.8em'>Si esto demora, verifica tu conexión a internet.</p>
     </div>
     """, unsafe_allow_html=True)
+
+# ==============================================================================
+# 7. PANEL DE DESARROLLO (INSTRUMENTACIÓN)
+# ==============================================================================
+
+if profiler.enabled:
+    rerun_record = profiler.finish(
+        site=site_key,
+        rows=len(df_raw) if df_raw is not None else 0,
+        snapshot=view_snap is not None,
+    )
+    instrument.append_log(rerun_record)
+
+if profiler.enabled and instrument.show_panel(st.query_params.get("dev")):
+    with st.sidebar:
+        with st.expander("🛠️ Panel de Desarrollo", expanded=True):
+            st.caption(f"**Rerun:** {rerun_record['total_ms']:,.0f} ms · {rerun_record['timestamp']}")
+            st.markdown("**Etapas**")
+            st.caption("peak_kb: pico de memoria del proceso; vacío si otra sesión corrió a la vez.")
+            st.dataframe(rerun_record['stages'], use_container_width=True, hide_index=True)
+            if rerun_record['caches']:
+                st.markdown("**Cachés**")
+                st.dataframe(
+                    [{'cache': name, **counts} for name, counts in rerun_record['caches'].items()],
+                    use_container_width=True, hide_index=True
+                )
+            if rerun_record['payloads']:
+                st.markdown("**Payloads (KB)**")
+                st.dataframe(
+                    [{'payload': name, 'kb': nbytes / 1024} for name, nbytes in rerun_record['payloads'].items()],
+                    use_container_width=True, hide_index=True
+                )
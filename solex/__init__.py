@@ -0,0 +1,6 @@
+"""
+Núcleo de SOLEX Forest Manager.
+
+Lógica de datos, gráficos y reportes compartida por el dashboard de Streamlit
+(`app.py`) y las herramientas desatendidas (`python -m solex.batch`).
+"""
@@ -0,0 +1,285 @@
+# ==============================================================================
+# MOTOR DE REPORTES POR LOTE (SIN STREAMLIT)
+# ==============================================================================
+# Genera el reporte mensual de muchos sitios sin abrir el dashboard:
+#
+#     python -m solex.batch sitios.csv --out reportes --workers 8 --png
+#
+# `sitios.csv` lista un sitio por fila con columnas: site, workbook, kml
+# (kml es opcional). Cada sitio se procesa en un proceso del pool y produce
+# `<out>/<site>/report.html` (KPIs, resumen narrativo y figuras interactivas),
+# `kpis.json` y, con --png y `kaleido` instalado, una imagen por figura.
+
+import argparse
+import csv
+import html
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+
+from solex import charts
+from solex.disk_cache import DEFAULT_CACHE_DIR, ParseCache, load_dataset_cached, load_zones_cached
+from solex.etl import generate_text_report
+
+
+@dataclass
+class SiteJob:
+    site: str
+    workbook: str
+    kml: str = None
+    slug: str = None  # Carpeta de salida; única dentro del manifiesto
+
+
+def slugify(name):
+    return re.sub(r'[^A-Za-z0-9_-]+', '_', name).strip('_') or 'sitio'
+
+
+def read_manifest(path):
+    """
+    Lee el CSV de sitios. Las rutas relativas se resuelven desde el CSV.
+    Si dos sitios dan la misma carpeta ("Sitio 1" y "Sitio_1"), la segunda
+    recibe un sufijo ("Sitio_1-2") para que no se sobrescriban sus reportes.
+    """
+    base = Path(path).resolve().parent
+    jobs = []
+    used = set()
+    with open(path, newline='', encoding='utf-8') as fh:
+        for row in csv.DictReader(fh):
+            workbook = (row.get('workbook') or '').strip()
+            if not workbook:
+                continue
+            kml = (row.get('kml') or '').strip() or None
+            site = (row.get('site') or '').strip() or Path(workbook).stem
+
+            # Comparación sin mayúsculas: los sistemas de archivos pueden no distinguirlas
+            slug = candidate = slugify(site)
+            n = 1
+            while candidate.lower() in used:
+                n += 1
+                candidate = f"{slug}-{n}"
+            used.add(candidate.lower())
+
+            jobs.append(SiteJob(
+                site=site,
+                workbook=str(base / workbook),
+                kml=str(base / kml) if kml else None,
+                slug=candidate,
+            ))
+    return jobs
+
+
+def build_site_figures(df, roi_params=None):
+    """Figuras del reporte estático, en el mismo orden que las pestañas del dashboard."""
+    figures = {}
+
+    fig_sun = charts.build_sunburst(df)
+    if fig_sun is not None: figures['sunburst'] = fig_sun
+
+    fig_pie = charts.build_health_pie(df)
+    if fig_pie is not None: figures['salud'] = fig_pie
+
+    if charts.has_biometrics(df):
+        figures['alometria'] = charts.build_scatter(df, charts.detect_trendline())
+        figures['distribucion'] = charts.build_histogram(df)
+
+    n_plants = charts.count_productive(df) or len(df)
+    roi = None
+    if n_plants > 0:
+        roi = charts.compute_roi(n_plants, **(roi_params or charts.ROI_DEFAULTS))
+        figures['roi'] = charts.build_waterfall(roi)
+
+    return figures, roi
+
+
+def _markdown_bold_to_html(text):
+    """Convierte el **negrita** del reporte narrativo a HTML."""
+    escaped = html.escape(text.strip())
+    escaped = re.sub(r'\*\*(.+?)\*\*', r'<b>\1</b>', escaped)
+    return '<br>'.join(line.strip() for line in escaped.splitlines())
+
+
+def render_html(site, kpis, roi, report_text, figures):
+    kpi_rows = [
+        ("Inventario Total", f"{kpis['total_trees']:,.0f}"),
+        ("Índice de Supervivencia", f"{kpis['salud_pct']:.1f}%"),
+        ("Altura Promedio", f"{kpis['avg_height']:.1f} cm"),
+        ("Zonas Activas", f"{kpis['n_zones']} Polígonos" if kpis['n_zones'] else "Sin Mapa"),
+    ]
+    if roi:
+        kpi_rows += [
+            ("Costo Total", f"${roi['total_cost']:,.0f}"),
+            ("Venta Proyectada", f"${roi['revenue']:,.0f}"),
+            ("Utilidad Neta", f"${roi['profit']:,.0f} (ROI {roi['roi']:.1f}%)"),
+        ]
+
+    kpi_html = ''.join(
+        f"<tr><th>{html.escape(label)}</th><td>{html.escape(value)}</td></tr>"
+        for label, value in kpi_rows
+    )
+    # plotly.js se incluye una sola vez (CDN) para el primer gráfico
+    figs_html = ''.join(
+        f"<section>{fig.to_html(full_html=False, include_plotlyjs='cdn' if i == 0 else False)}</section>"
+        for i, fig in enumerate(figures.values())
+    )
+    return f"""<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<title>SOLEX Forest Manager | {html.escape(site)}</title>
+<style>
+    body {{ font-family: Roboto, sans-serif; background: #f8f9fa; color: #1e293b; margin: 30px; }}
+    h1 {{ color: #1b5e20; border-bottom: 3px solid #4caf50; padding-bottom: 15px; }}
+    table {{ border-collapse: collapse; margin-bottom: 25px; }}
+    th, td {{ text-align: left; padding: 6px 14px; border-bottom: 1px solid #e2e8f0; }}
+    .report {{ background: #e3f2fd; border-radius: 8px; padding: 15px; margin-bottom: 25px; }}
+</style>
+</head>
+<body>
+<h1>🌵 Monitor de Reforestación: {html.escape(site)}</h1>
+<table>{kpi_html}</table>
+<div class="report">{_markdown_bold_to_html(report_text)}</div>
+{figs_html}
+</body>
+</html>
+"""
+
+
+def _write_png(fig, path):
+    """Exporta a PNG si kaleido está disponible. Devuelve True si se escribió."""
+    try:
+        import kaleido  # noqa: F401
+    except ImportError:
+        return False
+    fig.write_image(str(path))
+    return True
+
+
+def render_site(job, out_dir, cache_dir=DEFAULT_CACHE_DIR, png=False, roi_params=None):
+    """
+    Procesa un sitio completo. Se ejecuta dentro de un proceso del pool, por lo
+    que recibe y devuelve solo objetos serializables.
+    """
+    start = time.perf_counter()
+    cache = ParseCache(cache_dir)
+    warnings = []
+
+    df = load_dataset_cached(job.workbook, cache)
+    map_zones = load_zones_cached(job.kml, cache, on_warning=warnings.append) if job.kml else []
+
+    kpis = charts.compute_kpis(df, map_zones)
+    figures, roi = build_site_figures(df, roi_params)
+    report_text = generate_text_report(df, project_name=job.site)
+
+    site_dir = Path(out_dir) / (job.slug or slugify(job.site))
+    site_dir.mkdir(parents=True, exist_ok=True)
+    (site_dir / 'report.html').write_text(
+        render_html(job.site, kpis, roi, report_text, figures), encoding='utf-8'
+    )
+
+    pngs = []
+    if png:
+        for name, fig in figures.items():
+            if _write_png(fig, site_dir / f"{name}.png"):
+                pngs.append(f"{name}.png")
+            else:
+                warnings.append("kaleido no instalado: se omite la exportación PNG.")
+                break
+
+    summary = {
+        'site': job.site,
+        'dir': site_dir.name,
+        'kpis': kpis,
+        'roi': roi,
+        'figures': list(figures),
+        'png': pngs,
+        'warnings': warnings,
+        'cache': {'hits': cache.hits, 'misses': cache.misses},
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+    (site_dir / 'kpis.json').write_text(json.dumps(summary, indent=2, ensure_ascii=False), encoding='utf-8')
+    return summary
+
+
+def run_batch(jobs, out_dir, workers=None, cache_dir=DEFAULT_CACHE_DIR, png=False, roi_params=None):
+    """
+    Procesa todos los sitios en un pool de procesos. Un sitio que falla no
+    detiene el lote: queda registrado con su error en el resumen.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    results = []
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(render_site, job, out_dir, cache_dir, png, roi_params): job
+            for job in jobs
+        }
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append({'site': job.site, 'error': f"{type(e).__name__}: {e}"})
+
+    results.sort(key=lambda r: r['site'])
+    (out_dir / 'summary.json').write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding='utf-8')
+    (out_dir / 'index.html').write_text(render_index(results), encoding='utf-8')
+    return results
+
+
+def render_index(results):
+    rows = []
+    for r in results:
+        if 'error' in r:
+            rows.append(f"<tr><td>{html.escape(r['site'])}</td><td colspan='4'>❌ {html.escape(r['error'])}</td></tr>")
+            continue
+        k = r['kpis']
+        rows.append(
+            f"<tr><td><a href='{html.escape(r['dir'])}/report.html'>{html.escape(r['site'])}</a></td>"
+            f"<td>{k['total_trees']:,.0f}</td><td>{k['salud_pct']:.1f}%</td>"
+            f"<td>{k['avg_height']:.1f} cm</td><td>{k['n_zones']}</td></tr>"
+        )
+    return f"""<!DOCTYPE html>
+<html lang="es">
+<head><meta charset="utf-8"><title>SOLEX Forest Manager | Reporte por Lote</title></head>
+<body style="font-family: Roboto, sans-serif;">
+<h1>Reporte Mensual por Sitio</h1>
+<table border="1" cellpadding="6" style="border-collapse: collapse;">
+<tr><th>Sitio</th><th>Inventario</th><th>Supervivencia</th><th>Altura Promedio</th><th>Zonas</th></tr>
+{''.join(rows)}
+</table>
+</body>
+</html>
+"""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reportes estáticos de reforestación por lote.")
+    parser.add_argument('manifest', help="CSV con columnas site, workbook, kml")
+    parser.add_argument('--out', default='reportes', help="Directorio de salida")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Procesos en paralelo")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="Caché de parseo compartido")
+    parser.add_argument('--png', action='store_true', help="Exportar también PNG (requiere kaleido)")
+    args = parser.parse_args(argv)
+
+    jobs = read_manifest(args.manifest)
+    if not jobs:
+        parser.error("El manifiesto no contiene sitios.")
+
+    start = time.perf_counter()
+    results = run_batch(jobs, args.out, workers=args.workers, cache_dir=args.cache_dir, png=args.png)
+    failed = [r for r in results if 'error' in r]
+
+    print(f"{len(results) - len(failed)}/{len(results)} sitios en {time.perf_counter() - start:.1f}s -> {args.out}")
+    for r in failed:
+        print(f"  ERROR {r['site']}: {r['error']}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
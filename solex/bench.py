@@ -0,0 +1,254 @@
+# ==============================================================================
+# BANCO DE PRUEBAS DE RENDIMIENTO
+# ==============================================================================
+# Mide por separado cada etapa caliente del dashboard sobre plantaciones
+# sintéticas (`solex.synthetic`) y guarda los resultados en JSON para comparar
+# versiones:
+#
+#     python -m solex.bench --trees 1000 10000 --polygons 20 --vertices 100 --repeat 3
+#     python -m solex.bench --compare bench_results/anterior.json
+#
+# Etapas: load_data_engine, parse_kml_zones, filtro, mapa (bucle de marcadores
+# + datos del mapa de calor), mapa_html (serialización), biometría (figuras +
+# JSON que envía st.plotly_chart) y exportación xlsx.
+#
+# Con --readers compara los lectores de Excel (solex.excel) contra la llamada
+# histórica `pd.read_excel`, en un libro de una hoja y en uno de varias hojas:
+#
+#     python -m solex.bench --readers --trees 200000 --sheets 4 --repeat 1
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from io import BytesIO
+from pathlib import Path
+
+import folium
+import pandas as pd
+import plotly
+
+from solex import charts
+from solex import etl
+from solex import excel
+from solex import synthetic
+
+# Columnas que realmente usan KPIs, mapa y biometría (proyección de lectura)
+READER_COLUMNS = ['Tipo', 'Poligono', 'Coordenada_X', 'Coordenada_Y', 'Estado_Salud', 'Altura_cm', 'Diametro_cm']
+
+
+def _timeit(fn, repeat):
+    """Ejecuta `fn` `repeat` veces; devuelve (último resultado, tiempos en s)."""
+    runs = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        runs.append(time.perf_counter() - start)
+    return result, runs
+
+
+def _summary(runs):
+    return {
+        'min': min(runs),
+        'median': statistics.median(runs),
+        'mean': statistics.fmean(runs),
+        'runs': runs,
+    }
+
+
+def run_scenario(n_trees, n_polygons, n_vertices, repeat=3, seed=0):
+    """Genera una plantación sintética y cronometra cada etapa."""
+    zones_src = synthetic.generate_zones(n_polygons, n_vertices, seed=seed)
+    xlsx_bytes = synthetic.inventory_to_xlsx(synthetic.generate_inventory(n_trees, zones_src, seed=seed))
+    kml_bytes = synthetic.zones_to_kml(zones_src)
+
+    stages = {}
+
+    def load():
+        source = BytesIO(xlsx_bytes)
+        source.name = 'plantacion.xlsx'
+        return etl.load_data_engine(source)
+    df_raw, runs = _timeit(load, repeat)
+    stages['load_data_engine'] = _summary(runs)
+
+    map_zones, runs = _timeit(lambda: etl.parse_kml_zones(BytesIO(kml_bytes)), repeat)
+    stages['parse_kml_zones'] = _summary(runs)
+
+    # Filtro típico: se descarta una especie y una zona
+    species = sorted(df_raw['Tipo'].unique())[1:]
+    zones = sorted(df_raw['Poligono'].unique())[1:]
+    df, runs = _timeit(lambda: etl.apply_filters(df_raw, species, zones), repeat)
+    stages['filter'] = _summary(runs)
+
+    m, runs = _timeit(lambda: charts.build_map(df, map_zones, show_polys=True, show_heat=True, show_clusters=True), repeat)
+    stages['map'] = _summary(runs)
+
+    map_html, runs = _timeit(lambda: m.get_root().render(), repeat)
+    stages['map_html'] = _summary(runs)
+
+    trend_mode = charts.detect_trendline()
+
+    def biometrics():
+        figs = [charts.build_scatter(df, trend_mode), charts.build_histogram(df)]
+        return sum(len(fig.to_json()) for fig in figs)
+    bio_bytes, runs = _timeit(biometrics, repeat)
+    stages['biometrics'] = _summary(runs)
+
+    xlsx_out, runs = _timeit(lambda: charts.export_xlsx(df), repeat)
+    stages['export_xlsx'] = _summary(runs)
+
+    return {
+        'kind': 'stages',
+        'params': {'trees': n_trees, 'polygons': n_polygons, 'vertices': n_vertices, 'repeat': repeat, 'seed': seed},
+        'sizes': {
+            'input_xlsx_bytes': len(xlsx_bytes),
+            'input_kml_bytes': len(kml_bytes),
+            'rows_loaded': len(df_raw),
+            'rows_filtered': len(df),
+            'map_html_bytes': len(map_html),
+            'biometrics_json_bytes': bio_bytes,
+            'export_xlsx_bytes': len(xlsx_out),
+        },
+        'stages': stages,
+    }
+
+
+def run_reader_scenario(n_trees, n_sheets=4, repeat=3, seed=0):
+    """
+    Cronometra cada lector de Excel sobre el mismo inventario sintético.
+    `pd_read_excel` es la llamada que hacía `load_data_engine` antes del lector
+    rápido; `speedup` se calcula contra ella (y contra su versión multi-hoja).
+    """
+    zones = synthetic.generate_zones(max(n_sheets, 8), 4, seed=seed)
+    inventory = synthetic.generate_inventory(n_trees, zones, seed=seed)
+    single = synthetic.inventory_to_xlsx(inventory)
+    multi = synthetic.inventory_to_xlsx(inventory, n_sheets=n_sheets)
+
+    readers = {
+        'pd_read_excel': lambda: pd.read_excel(BytesIO(single)),
+        'openpyxl_stream': lambda: excel.read_workbook(BytesIO(single), engine='openpyxl'),
+        'openpyxl_stream_cols': lambda: excel.read_workbook(BytesIO(single), columns=READER_COLUMNS, engine='openpyxl'),
+    }
+    if excel.has_calamine():
+        readers['calamine'] = lambda: excel.read_workbook(BytesIO(single), engine='calamine')
+        readers['calamine_cols'] = lambda: excel.read_workbook(BytesIO(single), columns=READER_COLUMNS, engine='calamine')
+    multi_readers = {
+        'pd_read_excel_all_sheets': lambda: pd.concat(pd.read_excel(BytesIO(multi), sheet_name=None).values(), ignore_index=True),
+        'fast_all_sheets_serial': lambda: excel.read_workbook(BytesIO(multi), sheets='all', max_workers=1),
+        'fast_all_sheets_parallel': lambda: excel.read_workbook(BytesIO(multi), sheets='all'),
+    }
+
+    stages = {}
+    speedup = {}
+    for group, baseline in ((readers, 'pd_read_excel'), (multi_readers, 'pd_read_excel_all_sheets')):
+        for name, fn in group.items():
+            df, runs = _timeit(fn, repeat)
+            stages[name] = _summary(runs)
+            stages[name]['rows'] = len(df)
+            speedup[name] = stages[baseline]['median'] / stages[name]['median']
+
+    return {
+        'kind': 'readers',
+        'params': {'trees': n_trees, 'sheets': n_sheets, 'repeat': repeat, 'seed': seed},
+        'default_engine': excel.resolve_engine('auto'),
+        'sizes': {'single_sheet_xlsx_bytes': len(single), 'multi_sheet_xlsx_bytes': len(multi)},
+        'stages': stages,
+        'speedup': speedup,
+    }
+
+
+def _scenario_key(scenario):
+    params = {k: v for k, v in scenario['params'].items() if k not in ('repeat', 'seed')}
+    return (scenario.get('kind', 'stages'), tuple(sorted(params.items())))
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                             cwd=Path(__file__).resolve().parent, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment():
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'pandas': pd.__version__,
+        'plotly': plotly.__version__,
+        'folium': folium.__version__,
+    }
+
+
+def _describe(scenario):
+    p = scenario['params']
+    if scenario.get('kind') == 'readers':
+        return f"Lectores N={p['trees']} hojas={p['sheets']}"
+    return f"N={p['trees']} M={p['polygons']} V={p['vertices']}"
+
+
+def compare(current, baseline):
+    """Tabla de medianas actual vs. línea base, por escenario y etapa."""
+    base_by_params = {_scenario_key(s): s for s in baseline['scenarios']}
+    lines = []
+    for scenario in current['scenarios']:
+        base = base_by_params.get(_scenario_key(scenario))
+        if base is None:
+            continue
+        lines.append(_describe(scenario))
+        for stage, stats in scenario['stages'].items():
+            old = base['stages'].get(stage)
+            if old is None:
+                continue
+            ratio = stats['median'] / old['median'] if old['median'] else float('inf')
+            flag = "  <-- regresión" if ratio > 1.2 else ""
+            lines.append(f"  {stage:<26} {old['median']*1000:10.1f} ms -> {stats['median']*1000:10.1f} ms  x{ratio:5.2f}{flag}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Banco de pruebas de las etapas del dashboard.")
+    parser.add_argument('--trees', type=int, nargs='+', default=[1000, 10000], help="Tamaños N de inventario")
+    parser.add_argument('--polygons', type=int, default=20, help="Polígonos M del KML")
+    parser.add_argument('--vertices', type=int, default=100, help="Vértices V por polígono")
+    parser.add_argument('--repeat', type=int, default=3, help="Repeticiones por etapa")
+    parser.add_argument('--readers', action='store_true', help="Comparar lectores de Excel en lugar de etapas")
+    parser.add_argument('--sheets', type=int, default=4, help="Hojas del libro multi-hoja (con --readers)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default=None, help="Archivo JSON (por defecto bench_results/bench-<fecha>.json)")
+    parser.add_argument('--compare', default=None, help="JSON previo contra el que comparar medianas")
+    args = parser.parse_args(argv)
+
+    results = {'environment': environment(), 'scenarios': []}
+    for n_trees in args.trees:
+        if args.readers:
+            scenario = run_reader_scenario(n_trees, args.sheets, repeat=args.repeat, seed=args.seed)
+        else:
+            scenario = run_scenario(n_trees, args.polygons, args.vertices, repeat=args.repeat, seed=args.seed)
+        results['scenarios'].append(scenario)
+        print(_describe(scenario), flush=True)
+        for stage, stats in scenario['stages'].items():
+            extra = f"  x{scenario['speedup'][stage]:.2f}" if 'speedup' in scenario else ""
+            print(f"  {stage:<26} {stats['median']*1000:10.1f} ms{extra}")
+
+    out = Path(args.out) if args.out else Path('bench_results') / f"bench-{datetime.now():%Y%m%d-%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2), encoding='utf-8')
+    print(f"Resultados -> {out}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding='utf-8'))
+        print(compare(results, baseline))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
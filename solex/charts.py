@@ -0,0 +1,297 @@
+# ==============================================================================
+# INDICADORES, GRÁFICOS Y MAPA
+# ==============================================================================
+# Construcción de KPIs y figuras a partir de un DataFrame ya filtrado.
+# Cada función devuelve el objeto (dict, figura plotly o mapa folium) sin
+# renderizarlo, para que el dashboard y los reportes estáticos lo reutilicen.
+
+from io import BytesIO
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import folium
+from folium.plugins import MarkerCluster, HeatMap, Fullscreen, MiniMap, MeasureControl
+
+# Parámetros por defecto del simulador financiero (mismos que los widgets)
+ROI_DEFAULTS = {
+    'cost_plant': 60.0,
+    'cost_maint': 25.0,
+    'price_sale': 950.0,
+    'years': 7,
+    'risk_pct': 0.15,
+}
+
+# Capas del mapa activas al abrir el dashboard (mismas que los toggles)
+MAP_LAYER_DEFAULTS = {
+    'show_polys': True,
+    'show_heat': False,
+    'show_clusters': True,
+}
+
+PRODUCTIVE_SPECIES = "Maguey|Agave|Mezquite"
+
+POLYGON_COLORS = ['#3388ff', '#ff33bb', '#33ff57', '#ff9933', '#6600cc']
+
+
+def compute_kpis(df, map_zones=None):
+    """Calcula los indicadores clave de la cabecera del dashboard."""
+    total_trees = len(df)
+
+    # Cálculo seguro de Salud
+    salud_pct = 0
+    if 'Estado_Salud' in df.columns:
+        good_health = df['Estado_Salud'].str.contains('Excelente|Bueno', case=False, na=False).sum()
+        salud_pct = (good_health / total_trees * 100) if total_trees > 0 else 0
+
+    # Cálculo seguro de Altura
+    avg_height = 0
+    if 'Altura_cm' in df.columns:
+        avg_height = df['Altura_cm'].mean()
+
+    return {
+        'total_trees': total_trees,
+        'salud_pct': float(salud_pct),
+        'avg_height': float(avg_height) if pd.notna(avg_height) else 0.0,
+        'n_zones': len(map_zones) if map_zones else 0,
+    }
+
+
+def build_sunburst(df):
+    """Sunburst Zona > Especie > Estado. None si faltan columnas."""
+    if not ('Poligono' in df.columns and 'Tipo' in df.columns):
+        return None
+
+    path_cols = ['Poligono', 'Tipo']
+    if 'Estado_Salud' in df.columns: path_cols.append('Estado_Salud')
+
+    return px.sunburst(
+        df,
+        path=path_cols,
+        title="Niveles: Zona > Especie > Estado (Interactivo)",
+        color_discrete_sequence=px.colors.qualitative.Prism,
+        height=500
+    )
+
+
+def build_health_pie(df):
+    """Dona de proporción de salud. None si no existe 'Estado_Salud'."""
+    if 'Estado_Salud' not in df.columns:
+        return None
+
+    fig_pie = px.pie(
+        df,
+        names='Estado_Salud',
+        hole=0.5,
+        title="Proporción de Salud",
+        color_discrete_sequence=px.colors.sequential.Greens_r
+    )
+    fig_pie.update_traces(textposition='inside', textinfo='percent+label')
+    fig_pie.update_layout(showlegend=False)
+    return fig_pie
+
+
+def health_summary_table(df):
+    """Tabla resumen de conteos por estado de salud."""
+    summary_table = df['Estado_Salud'].value_counts().reset_index()
+    summary_table.columns = ['Estado', 'Cantidad']
+    return summary_table
+
+
+def has_biometrics(df):
+    return 'Altura_cm' in df.columns and 'Diametro_cm' in df.columns
+
+
+def detect_trendline():
+    """Devuelve 'ols' si statsmodels está instalado, None en caso contrario."""
+    try:
+        import statsmodels
+        return "ols"
+    except ImportError:
+        return None
+
+
+def build_scatter(df, trend_mode=None):
+    """Relación alométrica diámetro vs altura."""
+    return px.scatter(
+        df,
+        x='Diametro_cm',
+        y='Altura_cm',
+        color='Tipo' if 'Tipo' in df.columns else None,
+        size='Altura_cm',
+        hover_data=df.columns,
+        trendline=trend_mode,
+        title="Relación Alométrica: Diámetro vs Altura",
+        labels={'Diametro_cm': 'Diámetro de Tallo (cm)', 'Altura_cm': 'Altura Total (cm)'}
+    )
+
+
+def build_histogram(df):
+    """Histograma de distribución de alturas con boxplot marginal."""
+    return px.histogram(
+        df,
+        x='Altura_cm',
+        color='Tipo' if 'Tipo' in df.columns else None,
+        nbins=30,
+        title="Distribución de Tamaños en la Plantación",
+        marginal="box", # Muestra boxplot arriba
+        opacity=0.7
+    )
+
+
+def count_productive(df):
+    """Número de plantas productivas; None si no hay columna 'Tipo'."""
+    if 'Tipo' not in df.columns:
+        return None
+    mask_prod = df['Tipo'].str.contains(PRODUCTIVE_SPECIES, case=False, na=False)
+    return int(mask_prod.sum())
+
+
+def compute_roi(n_plants, cost_plant, cost_maint, price_sale, years, risk_pct):
+    """Modelo financiero simple: inversión, mantenimiento y venta a cosecha."""
+    capex = n_plants * cost_plant
+    opex = n_plants * cost_maint * years
+    total_cost = capex + opex
+
+    final_plants = n_plants * (1 - risk_pct)
+    revenue = final_plants * price_sale
+
+    profit = revenue - total_cost
+    roi = (profit / total_cost) * 100 if total_cost > 0 else 0
+
+    return {
+        'n_plants': n_plants,
+        'capex': capex,
+        'opex': opex,
+        'total_cost': total_cost,
+        'revenue': revenue,
+        'profit': profit,
+        'roi': roi,
+    }
+
+
+def build_waterfall(roi):
+    """Gráfico de cascada del flujo de caja a partir de `compute_roi`."""
+    capex, opex, revenue, profit = roi['capex'], roi['opex'], roi['revenue'], roi['profit']
+    fig_water = go.Figure(go.Waterfall(
+        orientation = "v",
+        measure = ["relative", "relative", "total", "relative", "total"],
+        x = ["Inversión Inicial", "Mantenimiento", "Costo Acumulado", "Venta Cosecha", "Ganancia Final"],
+        textposition = "outside",
+        text = [f"-{capex/1000:.0f}k", f"-{opex/1000:.0f}k", "", f"+{revenue/1000:.0f}k", f"{profit/1000:.0f}k"],
+        y = [-capex, -opex, 0, revenue, 0],
+        connector = {"line":{"color":"rgb(63, 63, 63)"}},
+        decreasing = {"marker":{"color":"#ef5350"}},
+        increasing = {"marker":{"color":"#66bb6a"}},
+        totals = {"marker":{"color":"#42a5f5"}}
+    ))
+    fig_water.update_layout(title="Flujo de Caja del Proyecto", height=450)
+    return fig_water
+
+
+def build_sites_bar(summary_df):
+    """Inventario por sitio, coloreado por índice de supervivencia."""
+    return px.bar(
+        summary_df,
+        x='Sitio',
+        y='Inventario',
+        color='Supervivencia_%',
+        color_continuous_scale='Greens',
+        title="Inventario por Sitio",
+        labels={'Supervivencia_%': 'Supervivencia (%)'}
+    )
+
+
+def build_health_pie_from_counts(health_counts):
+    """Dona de salud a partir de conteos ya agregados (vista multi-sitio)."""
+    fig_pie = px.pie(
+        names=list(health_counts),
+        values=list(health_counts.values()),
+        hole=0.5,
+        title="Proporción de Salud (Todos los Sitios)",
+        color_discrete_sequence=px.colors.sequential.Greens_r
+    )
+    fig_pie.update_traces(textposition='inside', textinfo='percent+label')
+    fig_pie.update_layout(showlegend=False)
+    return fig_pie
+
+
+def has_coordinates(df):
+    return 'Coordenada_X' in df.columns and 'Coordenada_Y' in df.columns
+
+
+def build_map(df, map_zones, show_polys=True, show_heat=False, show_clusters=True):
+    """Mapa folium con polígonos KML, mapa de calor y marcadores por espécimen."""
+    # Centro dinámico del mapa
+    lat_center = df['Coordenada_X'].mean() if not df.empty else 21.23
+    lon_center = df['Coordenada_Y'].mean() if not df.empty else -100.46
+
+    m = folium.Map(location=[lat_center, lon_center], zoom_start=17, tiles="OpenStreetMap")
+
+    # Plugins de Folium
+    Fullscreen().add_to(m)
+    MeasureControl(position='topright').add_to(m)
+    MiniMap(toggle_display=True).add_to(m)
+
+    # 1. CAPA DE POLÍGONOS (ZONAS KML)
+    if show_polys and map_zones:
+        for i, zone in enumerate(map_zones):
+            c = POLYGON_COLORS[i % len(POLYGON_COLORS)]
+            folium.Polygon(
+                locations=zone['points'],
+                tooltip=zone['name'],
+                popup=f"<b>Zona:</b> {zone['name']}",
+                color=c,
+                fill=True,
+                fill_opacity=0.15,
+                weight=2
+            ).add_to(m)
+
+    # 2. CAPA DE MAPA DE CALOR
+    df_geo = df.dropna(subset=['Coordenada_X', 'Coordenada_Y'])
+    if show_heat and not df_geo.empty:
+        heat_data = [[row['Coordenada_X'], row['Coordenada_Y']] for idx, row in df_geo.iterrows()]
+        HeatMap(heat_data, radius=15, blur=10).add_to(m)
+
+    # 3. CAPA DE PUNTOS (CLUSTER O INDIVIDUAL)
+    marker_group = MarkerCluster().add_to(m) if show_clusters else m
+
+    for _, row in df_geo.iterrows():
+        # Lógica de Color
+        status = str(row.get('Estado_Salud', '')).lower()
+        if 'crítico' in status or 'muerto' in status:
+            icon_color = 'red'
+            icon_icon = 'times'
+        elif 'regular' in status or 'estrés' in status:
+            icon_color = 'orange'
+            icon_icon = 'exclamation'
+        else:
+            icon_color = 'green'
+            icon_icon = 'leaf'
+
+        html_popup = f"""
+        <div style='font-family:sans-serif; min-width:120px'>
+            <h5 style='margin:0'>{row.get('ID_Especimen','ID')}</h5>
+            <hr style='margin:5px 0'>
+            <b>Tipo:</b> {row.get('Tipo','-')}<br>
+            <b>Salud:</b> {row.get('Estado_Salud','-')}<br>
+            <b>Zona:</b> {row.get('Poligono','-')}
+        </div>
+        """
+
+        folium.Marker(
+            location=[row['Coordenada_X'], row['Coordenada_Y']],
+            popup=folium.Popup(html_popup, max_width=200),
+            tooltip=f"{row.get('Tipo')}",
+            icon=folium.Icon(color=icon_color, icon=icon_icon, prefix='fa')
+        ).add_to(marker_group)
+
+    return m
+
+
+def export_xlsx(df, sheet_name='Plantacion_Editada'):
+    """Serializa el DataFrame a un .xlsx en memoria (bytes)."""
+    buffer = BytesIO()
+    with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
+        df.to_excel(writer, index=False, sheet_name=sheet_name)
+    return buffer.getvalue()
@@ -0,0 +1,99 @@
+# ==============================================================================
+# CACHÉ EN DISCO DE PARSEO
+# ==============================================================================
+# `st.cache_data` vive en la memoria del proceso de Streamlit y se pierde entre
+# ejecuciones. Los reportes por lote usan este caché en disco, indexado por el
+# hash del contenido, para no volver a parsear un Excel o KML que no cambió.
+# Las escrituras son atómicas (archivo temporal + os.replace), por lo que
+# varios procesos del pool pueden compartir el mismo directorio.
+
+import hashlib
+import os
+import pickle
+import tempfile
+from io import BytesIO
+from pathlib import Path
+
+import pandas as pd
+
+from solex.etl import load_data_engine, parse_kml_zones
+
+# Incrementar cuando cambie la limpieza de datos o el parser para invalidar
+# entradas viejas.
+CACHE_VERSION = 2
+
+DEFAULT_CACHE_DIR = os.environ.get("SOLEX_CACHE_DIR", ".solex_cache")
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class ParseCache:
+    """Caché clave/valor en disco (pickle) con claves derivadas del contenido."""
+
+    def __init__(self, root=DEFAULT_CACHE_DIR):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, kind, digest):
+        # Un pickle de DataFrame solo es fiable con la misma versión de pandas
+        return self.root / f"{kind}-v{CACHE_VERSION}-pd{pd.__version__}-{digest}.pkl"
+
+    def get(self, kind, digest):
+        path = self._path(kind, digest)
+        try:
+            with open(path, 'rb') as fh:
+                value = pickle.load(fh)
+        except Exception:
+            # Archivo ausente, truncado o escrito por otro entorno
+            # (AttributeError, ModuleNotFoundError, ...): se trata como fallo
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def put(self, kind, digest, value):
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._path(kind, digest))
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def clear(self):
+        for path in self.root.glob('*.pkl'):
+            path.unlink()
+
+
+def load_dataset_cached(path, cache):
+    """`load_data_engine` sobre una ruta local, memorizado en `cache`."""
+    path = Path(path)
+    data = path.read_bytes()
+    kind = 'csv' if path.suffix == '.csv' else 'xlsx'
+    digest = content_hash(data)
+
+    df = cache.get(kind, digest)
+    if df is None:
+        source = BytesIO(data)
+        source.name = path.name
+        df = load_data_engine(source)
+        cache.put(kind, digest, df)
+    return df
+
+
+def load_zones_cached(path, cache, on_warning=None):
+    """`parse_kml_zones` sobre una ruta local, memorizado en `cache`."""
+    data = Path(path).read_bytes()
+    digest = content_hash(data)
+
+    zones = cache.get('kml', digest)
+    if zones is None:
+        zones = parse_kml_zones(BytesIO(data), on_warning=on_warning)
+        cache.put('kml', digest, zones)
+    return zones
@@ -0,0 +1,235 @@
+# ==============================================================================
+# LÓGICA DE NEGOCIO Y PROCESAMIENTO DE DATOS (ETL)
+# ==============================================================================
+# Funciones puras, sin dependencia de Streamlit, para que el dashboard y los
+# procesos desatendidos (reportes por lote) compartan exactamente la misma
+# limpieza de datos y lectura de KML.
+
+import xml.etree.ElementTree as ET
+from contextlib import nullcontext
+from io import BytesIO
+from datetime import datetime
+
+import pandas as pd
+import requests
+
+from solex.excel import normalize_header, read_workbook
+
+NUMERIC_COLS = ['Coordenada_X', 'Coordenada_Y', 'Altura_cm', 'Diametro_cm', 'Costo', 'Edad_Meses']
+
+KML_NAMESPACES = {
+    'k': 'http://www.opengis.net/kml/2.2',
+    'gx': 'http://www.google.com/kml/ext/2.2'
+}
+
+
+def safe_float_convert(value):
+    """Intenta convertir a float de forma segura, retornando None si falla."""
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def fetch_bytes(url, timeout=10):
+    """Descarga un recurso remoto y lo devuelve como BytesIO."""
+    response = requests.get(url, timeout=timeout)
+    response.raise_for_status()
+    return BytesIO(response.content)
+
+
+def clean_dataframe(df):
+    """
+    Limpieza profunda de nombres de columnas y tipos de datos.
+    Es el mismo tratamiento para cualquier origen (URL, archivo local, lote).
+    """
+    # 1. Limpieza de Cabeceras (Trim, Remove special chars)
+    df.columns = df.columns.astype(str).str.strip().str.replace(r'[,.:]', '', regex=True)
+
+    # 2. Eliminación de Duplicados (Columnas repetidas por error en Excel)
+    df = df.loc[:, ~df.columns.duplicated()]
+
+    # 3. Conversión de Tipos (Casteo explícito)
+    for col in NUMERIC_COLS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    # 4. Formateo de Textos
+    if 'Estado_Salud' in df.columns:
+        df['Estado_Salud'] = df['Estado_Salud'].astype(str).str.strip().str.capitalize()
+
+    if 'Tipo' in df.columns:
+        df['Tipo'] = df['Tipo'].astype(str).str.strip()
+
+    # 5. Validación de Coordenadas (Limpieza de ceros o nulos)
+    if 'Coordenada_X' in df.columns:
+        df = df[df['Coordenada_X'].notna()]
+
+    return df
+
+
+def no_stage(name):
+    return nullcontext()
+
+
+def _source_name(source):
+    """Nombre de archivo de un origen local (ruta o archivo subido)."""
+    return str(getattr(source, 'name', source))
+
+
+def load_data_engine(source, is_url=False, stage=None, columns=None, sheets=None, engine='auto'):
+    """
+    Motor principal de carga de datos.
+    Soporta Excel (.xlsx) y CSV (.csv), desde URL, ruta local o archivo subido.
+    Lanza la excepción original si la lectura falla; quien llama decide cómo
+    notificarla. `stage(name)` opcional mide descarga, parseo y limpieza por
+    separado (ver solex.instrument).
+
+    `columns` limita la lectura a esas columnas (nombres ya limpios), `sheets`
+    admite None (primera hoja), 'all' o una lista de hojas a unir, y `engine`
+    elige el lector de Excel (ver solex.excel; 'pandas' es el `pd.read_excel`
+    de siempre).
+    """
+    stage = stage or no_stage
+    if is_url:
+        with stage('descarga_excel'):
+            source = fetch_bytes(source)
+
+    with stage('parseo_excel'):
+        if not is_url and _source_name(source).endswith('.csv'):
+            usecols = (lambda c: normalize_header(c) in set(columns)) if columns else None
+            df = pd.read_csv(source, usecols=usecols)
+        else:
+            df = read_workbook(source, columns=columns, sheets=sheets, engine=engine)
+
+    with stage('limpieza'):
+        return clean_dataframe(df)
+
+
+def parse_kml_zones(kml_bytes, on_warning=None):
+    """
+    Parser robusto para KML.
+    Maneja XML namespaces y busca coordenadas anidadas profundamente.
+    Los errores no interrumpen la carga: se reportan vía `on_warning`.
+    """
+    zonas = []
+    if kml_bytes is None:
+        return zonas
+
+    try:
+        kml_bytes.seek(0)
+        content = kml_bytes.read()
+
+        # Intentar decodificar con utf-8, fallback a latin-1
+        try:
+            xml_string = content.decode('utf-8')
+        except UnicodeDecodeError:
+            xml_string = content.decode('latin-1')
+
+        root = ET.fromstring(xml_string)
+
+        # Búsqueda agnóstica de Placemarks (con y sin namespace)
+        placemarks = root.findall('.//k:Placemark', KML_NAMESPACES)
+        if not placemarks:
+            placemarks = root.findall('.//Placemark') # Intento sin namespace explícito
+
+        for pm in placemarks:
+            # 1. Extraer Nombre
+            name_node = pm.find('.//k:name', KML_NAMESPACES)
+            if name_node is None: name_node = pm.find('.//name')
+
+            zone_name = name_node.text if name_node is not None else "Zona Desconocida"
+
+            # 2. Extraer Polígono (Coordinates)
+            coords_node = pm.find('.//k:coordinates', KML_NAMESPACES)
+            if coords_node is None: coords_node = pm.find('.//coordinates')
+
+            if coords_node is not None and coords_node.text:
+                raw_coords = coords_node.text.strip().split()
+                points = []
+                for c in raw_coords:
+                    parts = c.split(',')
+                    if len(parts) >= 2:
+                        # IMPORTANTE: KML usa (Lon, Lat), Folium necesita (Lat, Lon)
+                        lon = float(parts[0])
+                        lat = float(parts[1])
+                        points.append([lat, lon])
+
+                # Validar que sea un polígono (mínimo 3 puntos)
+                if len(points) > 2:
+                    zonas.append({'name': zone_name, 'points': points})
+
+    except ET.ParseError as e:
+        if on_warning: on_warning(f"Error parseando XML del KML: {e}")
+    except Exception as e:
+        if on_warning: on_warning(f"Error procesando zonas KML: {e}")
+
+    return zonas
+
+
+def apply_filters(df_raw, selected_species=None, selected_zones=None):
+    """
+    Aplica los filtros de especie y zona del panel lateral. Las opciones son
+    los valores como texto, así que se comparan como texto (un polígono
+    numérico 1 coincide con la opción "1"): con todas las opciones marcadas
+    el resultado tiene todas las filas.
+    """
+    df = df_raw.copy()
+    if selected_species and 'Tipo' in df.columns:
+        df = df[df['Tipo'].astype(str).isin(selected_species)]
+    if selected_zones and 'Poligono' in df.columns:
+        df = df[df['Poligono'].astype(str).isin(selected_zones)]
+    return df
+
+
+def report_stats(df):
+    """
+    Cifras del reporte narrativo (dict serializable). Se separan del texto
+    para que la vista pre-renderizada las guarde y la fecha sea la del día.
+    """
+    if df is None or df.empty:
+        return None
+
+    total = len(df)
+    stats = {
+        'total': total,
+        'zonas': int(df['Poligono'].nunique()) if 'Poligono' in df.columns else 0,
+        'especies': int(df['Tipo'].nunique()) if 'Tipo' in df.columns else 0,
+        'top_salud': None,
+        'pct_top': 0.0,
+    }
+    if 'Estado_Salud' in df.columns:
+        salud_counts = df['Estado_Salud'].value_counts()
+        stats['top_salud'] = str(salud_counts.idxmax())
+        stats['pct_top'] = float(salud_counts.max() / total * 100)
+    return stats
+
+
+def generate_text_report(df, project_name="Cerrito del Carmen"):
+    """Genera un reporte narrativo basado en los datos actuales."""
+    return format_text_report(report_stats(df), project_name)
+
+
+def format_text_report(stats, project_name="Cerrito del Carmen"):
+    """Texto del reporte a partir de `report_stats`."""
+    if stats is None: return "No hay datos disponibles para generar el reporte."
+
+    total = stats['total']
+    zonas = stats['zonas']
+    especies = stats['especies']
+
+    # Salud
+    salud_txt = "datos no disponibles"
+    if stats['top_salud'] is not None:
+        salud_txt = f"El estado predominante es **{stats['top_salud']}** ({stats['pct_top']:.1f}%)."
+
+    report = f"""
+    **RESUMEN EJECUTIVO AUTOMATIZADO**
+
+    A fecha de **{datetime.now().strftime('%d/%m/%Y')}**, el proyecto "{project_name}" gestiona un inventario biológico de **{total:,.0f} especímenes**.
+    La reforestación se distribuye a lo largo de **{zonas} zonas geográficas** (polígonos), integrando una biodiversidad de **{especies} especies distintas**.
+
+    **Análisis Fitosanitario:**
+    {salud_txt}
+    """
+    return report
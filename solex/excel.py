@@ -0,0 +1,238 @@
+# ==============================================================================
+# LECTOR RÁPIDO DE EXCEL
+# ==============================================================================
+# `pd.read_excel` con openpyxl construye el modelo de objetos completo del libro
+# (celdas, estilos) y solo lee la primera hoja. Este lector:
+#
+# - usa calamine (Rust, `pip install python-calamine`) si está instalado, o
+#   openpyxl en modo `read_only` + `values_only` (streaming fila a fila);
+# - lee solo las columnas pedidas (comparadas con el nombre ya limpio, p. ej.
+#   "Coordenada_X" coincide con la cabecera "Coordenada_X,");
+# - lee varias hojas (una por zona o por levantamiento) en paralelo, en un pool
+#   de procesos, y las une agregando la columna "Hoja".
+#
+# El resultado es equivalente al de `pd.read_excel` y pasa por la misma
+# `clean_dataframe` en `solex.etl`.
+
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from itertools import repeat
+from operator import itemgetter
+from pathlib import Path
+
+import numpy as np
+import openpyxl
+import pandas as pd
+from openpyxl.cell.cell import ERROR_CODES
+from pandas.errors import EmptyDataError
+from pandas.io.parsers import TextParser
+
+ENGINES = ('auto', 'calamine', 'openpyxl', 'pandas')
+
+# Por debajo de este tamaño el arranque del pool (cada proceso importa pandas
+# y recibe su copia del libro) cuesta más que leer en serie
+PARALLEL_MIN_BYTES = 5_000_000
+
+SHEET_COLUMN = 'Hoja'
+
+
+def normalize_header(name):
+    """Misma normalización de cabeceras que `clean_dataframe`."""
+    return re.sub(r'[,.:]', '', str(name).strip())
+
+
+def _normalize_columns(df):
+    """Cabeceras normalizadas; de las que coinciden tras normalizar queda la primera."""
+    df.columns = [normalize_header(c) for c in df.columns]
+    return df.loc[:, ~df.columns.duplicated()]
+
+
+def has_calamine():
+    try:
+        import python_calamine  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def resolve_engine(engine='auto'):
+    if engine not in ENGINES:
+        raise ValueError(f"Motor de Excel desconocido: {engine!r} (opciones: {', '.join(ENGINES)})")
+    if engine == 'auto':
+        return 'calamine' if has_calamine() else 'openpyxl'
+    return engine
+
+
+def read_source_bytes(source):
+    """Contenido completo de una ruta, BytesIO o archivo subido de Streamlit."""
+    if isinstance(source, (str, Path)):
+        return Path(source).read_bytes()
+    if hasattr(source, 'getvalue'):
+        return source.getvalue()
+    source.seek(0)
+    return source.read()
+
+
+def list_sheets(data):
+    wb = openpyxl.load_workbook(BytesIO(data), read_only=True)
+    try:
+        return wb.sheetnames
+    finally:
+        wb.close()
+
+
+def _column_filter(columns):
+    if not columns:
+        return None
+    wanted = set(columns)
+    return lambda name: normalize_header(name) in wanted
+
+
+def _dedupe_headers(header):
+    """Nombres de columna como los genera pandas ("Unnamed: n", "A", "A.1")."""
+    names, seen = [], {}
+    for i, h in enumerate(header):
+        name = f"Unnamed: {i}" if h is None or h == "" else str(h)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _convert_value(value):
+    """Misma conversión de celdas que el lector openpyxl de pandas."""
+    if value is None:
+        return ""
+    if type(value) is float:
+        as_int = int(value)
+        return as_int if as_int == value else value
+    if type(value) is str and value in ERROR_CODES:
+        return np.nan
+    return value
+
+
+def _read_sheet_openpyxl(data, sheet, columns):
+    """
+    Lectura en streaming (`read_only` + `values_only`) con las mismas reglas
+    que `pd.read_excel`: se conservan las filas en blanco intermedias (como
+    NaN) y solo se recortan las del final; el ancho lo da la fila más ancha
+    (las columnas sin cabecera se llaman "Unnamed: n"), y los tipos los infiere
+    el mismo `TextParser` de pandas. Con `columns` solo se convierten las
+    celdas de las columnas pedidas.
+    """
+    wb = openpyxl.load_workbook(BytesIO(data), read_only=True, data_only=True)
+    try:
+        ws = wb[sheet] if sheet is not None else wb.worksheets[0]
+        ws.reset_dimensions()  # Las dimensiones guardadas en el archivo pueden mentir
+        rows = []
+        width = 0
+        last_with_data = -1
+        for i, row in enumerate(ws.iter_rows(values_only=True)):
+            n = len(row)
+            while n and row[n - 1] is None:  # Celdas vacías al final de la fila
+                n -= 1
+            if n:
+                last_with_data = i
+                width = max(width, n)
+            rows.append(tuple(row))  # Las filas vacías llegan como lista
+    finally:
+        wb.close()
+
+    del rows[last_with_data + 1:]  # Filas vacías al final de la hoja
+    if not rows:
+        return pd.DataFrame()
+
+    def padded(row):
+        return row + (None,) * (width - len(row)) if len(row) < width else row[:width]
+
+    keep = _column_filter(columns)
+    if keep is None:
+        matrix = [[_convert_value(v) for v in padded(row)] for row in rows]
+        return _parse_rows(matrix, header=0)
+
+    header = [_convert_value(v) for v in padded(rows[0])]
+    names = _dedupe_headers(header)
+    idx = [i for i, name in enumerate(names) if keep(name)]
+    if not idx:
+        return pd.DataFrame()
+    if len(idx) == 1:
+        pick = lambda row: (row[idx[0]],)
+    else:
+        pick = itemgetter(*idx)
+    matrix = [[_convert_value(v) for v in pick(padded(row))] for row in rows[1:]]
+    return _parse_rows(matrix, names=[names[i] for i in idx])
+
+
+def _parse_rows(matrix, header=None, names=None):
+    """Inferencia de tipos igual a `pd.read_excel` (TextParser sin omitir filas en blanco)."""
+    try:
+        return TextParser(matrix, header=header, names=names, skip_blank_lines=False).read()
+    except EmptyDataError:
+        return pd.DataFrame()
+
+
+def _read_sheet_pandas(data, sheet, columns, engine):
+    return pd.read_excel(
+        BytesIO(data),
+        sheet_name=sheet if sheet is not None else 0,
+        usecols=_column_filter(columns),
+        engine=engine,
+    )
+
+
+def read_sheet(data, sheet=None, columns=None, engine='auto'):
+    """Lee una hoja (por defecto la primera) de un libro en memoria."""
+    engine = resolve_engine(engine)
+    if engine == 'openpyxl':
+        return _read_sheet_openpyxl(data, sheet, columns)
+    return _read_sheet_pandas(data, sheet, columns, 'calamine' if engine == 'calamine' else None)
+
+
+def read_workbook(source, columns=None, sheets=None, engine='auto', max_workers=None):
+    """
+    Lee un libro de Excel con el lector rápido.
+
+    `sheets`: None (primera hoja, como `pd.read_excel`), 'all' o lista de nombres.
+    Con más de una hoja no vacía el resultado lleva la columna "Hoja" con el
+    nombre de origen de cada fila. Las hojas se leen en paralelo (procesos
+    'spawn') si el libro pesa más de PARALLEL_MIN_BYTES, hay más de un CPU y
+    `max_workers` no es 1.
+    """
+    data = read_source_bytes(source)
+    engine = resolve_engine(engine)
+
+    if sheets is None:
+        return read_sheet(data, None, columns, engine)
+
+    sheet_names = list_sheets(data) if sheets == 'all' else list(sheets)
+    workers = min(len(sheet_names), max_workers or os.cpu_count() or 1)
+
+    if workers > 1 and len(data) >= PARALLEL_MIN_BYTES:
+        # 'spawn' y no 'fork': el servidor de Streamlit tiene muchos hilos y
+        # hacer fork de un proceso con hilos puede dejar locks tomados
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            frames = list(pool.map(read_sheet, repeat(data), sheet_names, repeat(columns), repeat(engine)))
+    else:
+        frames = [read_sheet(data, name, columns, engine) for name in sheet_names]
+
+    named = [(name, df) for name, df in zip(sheet_names, frames) if not df.empty]
+    if not named:
+        return pd.DataFrame()
+    if len(named) == 1:
+        return named[0][1]
+
+    # Las cabeceras se normalizan antes de unir: si una hoja escribe
+    # "Coordenada_X," y otra "Coordenada_X", deben quedar en la misma columna
+    merged = []
+    for name, df in named:
+        df = _normalize_columns(df)
+        df[SHEET_COLUMN] = name
+        merged.append(df)
+    return pd.concat(merged, ignore_index=True)
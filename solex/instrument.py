@@ -0,0 +1,216 @@
+# ==============================================================================
+# INSTRUMENTACIÓN POR RERUN
+# ==============================================================================
+# Tiempo de pared y pico de memoria por etapa, aciertos/fallos de caché y
+# tamaño de los payloads (mapa y figuras) de cada ejecución del script.
+#
+# Solo la variable de entorno SOLEX_PROFILE=1 (decisión del operador) activa la
+# instrumentación; `?dev=1` en la URL únicamente muestra el panel cuando ya está
+# activa, de modo que un visitante no puede encenderla. Desactivada, cada
+# llamada retorna de inmediato (sin tracemalloc, sin serializar figuras).
+#
+# tracemalloc es global al proceso y Streamlit ejecuta cada sesión como un hilo
+# del mismo proceso: se inicia una sola vez y nunca se detiene por rerun. El
+# pico de memoria de una etapa es el del proceso completo, así que solo se
+# registra si ningún otro rerun instrumentado corrió a la vez (si no, None).
+#
+# Medir los payloads obliga a serializar de nuevo figuras y mapa, lo que cuesta
+# casi tanto como renderizarlos: se miden al cerrar el rerun, dentro de su
+# propia etapa `payloads`, para no inflar `total_ms` sin atribuirlo a nada.
+#
+# Cada rerun instrumentado se agrega como una línea JSON a
+# `.solex_profile/reruns.jsonl` (SOLEX_PROFILE_LOG), con rotación por tamaño.
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+import weakref
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+
+DEFAULT_LOG_PATH = os.environ.get("SOLEX_PROFILE_LOG", ".solex_profile/reruns.jsonl")
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 3
+
+_TRUTHY = ('1', 'true', 'yes', 'on')
+
+# Reruns instrumentados en curso en el proceso; `_generation` cambia con cada
+# rerun que empieza, para detectar etapas que se solaparon con otra sesión.
+_lock = threading.Lock()
+_active = 0
+_generation = 0
+
+
+def is_enabled():
+    """Activo solo si la variable de entorno SOLEX_PROFILE es verdadera."""
+    return os.environ.get("SOLEX_PROFILE", "").lower() in _TRUTHY
+
+
+def show_panel(flag=None):
+    """Panel de desarrollo: `flag` (p. ej. ?dev=1) verdadero y SOLEX_PROFILE activo."""
+    return is_enabled() and str(flag or "").lower() in _TRUTHY
+
+
+def _enter():
+    global _active, _generation
+    with _lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()  # Una vez por proceso; no se detiene
+        _active += 1
+        _generation += 1
+
+
+def _leave():
+    global _active
+    with _lock:
+        _active -= 1
+
+
+def _concurrency():
+    with _lock:
+        return _active, _generation
+
+
+class RerunProfiler:
+    """
+    Acumula las métricas de una sola ejecución del script.
+    Las etapas se miden de forma secuencial: no deben anidarse, porque el pico
+    de memoria se reinicia al inicio de cada una.
+    """
+
+    def __init__(self, enabled=False, trace_memory=True):
+        self.enabled = enabled
+        self.trace_memory = enabled and trace_memory
+        self.stages = []
+        self.caches = {}
+        self.payloads = {}
+        self._pending_payloads = {}
+        self._pending_miss = set()
+        self._started = time.perf_counter()
+        self._timestamp = datetime.now().isoformat(timespec='seconds')
+        self._release = None
+        if self.trace_memory:
+            _enter()
+            # Se libera en finish(), o al recolectarse si el rerun se interrumpe
+            self._release = weakref.finalize(self, _leave)
+
+    # --- ETAPAS ---
+
+    def stage(self, name):
+        """Context manager que mide tiempo y pico de memoria de la etapa `name`."""
+        if not self.enabled:
+            return nullcontext()
+        return self._stage(name)
+
+    @contextmanager
+    def _stage(self, name):
+        if self.trace_memory:
+            active, generation = _concurrency()
+            solo = active == 1
+            if solo:
+                tracemalloc.reset_peak()
+            mem_start = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record = {'stage': name, 'ms': (time.perf_counter() - start) * 1000}
+            if self.trace_memory:
+                # Pico del proceso: solo es atribuible a esta etapa sin otras sesiones
+                if solo and _concurrency() == (1, generation):
+                    record['peak_kb'] = max(0, tracemalloc.get_traced_memory()[1] - mem_start) / 1024
+                else:
+                    record['peak_kb'] = None
+            self.stages.append(record)
+
+    # --- CACHÉS ---
+
+    def cache_lookup(self, name):
+        """
+        Envuelve la llamada a una función con `st.cache_data`. Cuenta un acierto
+        salvo que el cuerpo de la función llame a `cache_miss(name)`, lo que solo
+        ocurre cuando Streamlit no encontró el resultado en caché.
+        """
+        if not self.enabled:
+            return nullcontext()
+        return self._cache_lookup(name)
+
+    @contextmanager
+    def _cache_lookup(self, name):
+        self._pending_miss.discard(name)
+        try:
+            yield
+        finally:
+            self._count(name, hit=name not in self._pending_miss)
+            self._pending_miss.discard(name)
+
+    def cache_miss(self, name):
+        if self.enabled:
+            self._pending_miss.add(name)
+
+    def cache_probe(self, name):
+        """Callback `probe(hit)` para `SiteCache.get_or_load`; None si está desactivado."""
+        if not self.enabled:
+            return None
+        return lambda hit: self._count(name, hit)
+
+    def _count(self, name, hit):
+        counts = self.caches.setdefault(name, {'hits': 0, 'misses': 0})
+        counts['hits' if hit else 'misses'] += 1
+
+    # --- PAYLOADS ---
+
+    def payload(self, name, nbytes):
+        if self.enabled:
+            self.payloads[name] = nbytes
+
+    def payload_figure(self, name, fig):
+        """Tamaño del JSON que `st.plotly_chart` envía al navegador (se mide en `finish`)."""
+        if self.enabled and fig is not None:
+            self._pending_payloads[name] = lambda: len(fig.to_json())
+
+    def payload_map(self, name, m):
+        """Tamaño del HTML del mapa folium que recibe `st_folium` (se mide en `finish`)."""
+        if self.enabled and m is not None:
+            self._pending_payloads[name] = lambda: len(m.get_root().render())
+
+    # --- CIERRE ---
+
+    def finish(self, **meta):
+        """Cierra el rerun y devuelve su registro (dict serializable)."""
+        if self._pending_payloads:
+            with self.stage('payloads'):
+                for name, measure in self._pending_payloads.items():
+                    self.payloads[name] = measure()
+            self._pending_payloads.clear()
+
+        record = {
+            'timestamp': self._timestamp,
+            'total_ms': (time.perf_counter() - self._started) * 1000,
+            'stages': self.stages,
+            'caches': self.caches,
+            'payloads': self.payloads,
+            **meta,
+        }
+        if self._release is not None:
+            self._release()  # Idempotente; tracemalloc sigue activo para el proceso
+        return record
+
+
+def append_log(record, path=DEFAULT_LOG_PATH, max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS):
+    """Agrega `record` como línea JSON, rotando a .1, .2, ... al superar `max_bytes`."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    if path.exists() and path.stat().st_size >= max_bytes:
+        for i in range(backups - 1, 0, -1):
+            older = path.with_name(f"{path.name}.{i}")
+            if older.exists():
+                os.replace(older, path.with_name(f"{path.name}.{i + 1}"))
+        os.replace(path, path.with_name(f"{path.name}.1"))
+
+    with open(path, 'a', encoding='utf-8') as fh:
+        fh.write(json.dumps(record, ensure_ascii=False) + '\n')
@@ -0,0 +1,282 @@
+# ==============================================================================
+# SNAPSHOT DE LA VISTA PREDETERMINADA
+# ==============================================================================
+# La mayoría de las visitas solo mira el dashboard sin filtros. Este módulo
+# pre-renderiza esa vista (KPIs, figuras como JSON, HTML del mapa y el .xlsx de
+# descarga) una vez por versión del dataset, para servirla sin recalcular:
+#
+# - la versión es un hash del contenido del DataFrame limpio y de las zonas
+#   KML, de modo que cualquier cambio en el Excel o el KML genera otra;
+# - el snapshot se guarda en disco (`.solex_snapshots/<sitio>/<versión>.*`,
+#   SOLEX_SNAPSHOT_DIR) y sobrevive a reinicios del servidor; al escribir una
+#   versión nueva se borran las anteriores del mismo sitio;
+# - en memoria vive en el caché compartido de sitios (solex.workspace), una
+#   versión por sitio y dentro del presupuesto global de memoria;
+# - solo existe para sitios del registro: los archivos subidos a mano no se
+#   escriben en disco compartido;
+# - el dashboard lo usa solo mientras filtros y widgets estén en sus valores
+#   por defecto; cualquier cambio vuelve al cálculo en vivo.
+#
+# Para pre-renderizar todos los sitios del registro (p. ej. tras publicar
+# datos nuevos):
+#
+#     python -m solex.snapshot [--sites sites.json] [--out .solex_snapshots]
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import weakref
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import plotly.graph_objects as go
+
+from solex import charts
+from solex import etl
+from solex import workspace
+
+# Incrementar cuando cambien las figuras o el contenido del snapshot
+SNAPSHOT_FORMAT = 2
+
+DEFAULT_SNAPSHOT_DIR = os.environ.get("SOLEX_SNAPSHOT_DIR", ".solex_snapshots")
+
+# id(df) -> (weakref, hash). Por identidad y no en `df.attrs`, porque pandas
+# copia `attrs` a los DataFrames derivados (copias, filtros, el editor).
+_version_memo = {}
+_memo_lock = threading.Lock()
+
+_FALSY = ('0', 'false', 'no', 'off')
+
+
+def is_enabled():
+    """Activo salvo SOLEX_SNAPSHOT=0."""
+    return os.environ.get("SOLEX_SNAPSHOT", "1").lower() not in _FALSY
+
+
+def filter_options(df_raw):
+    """Opciones de los filtros de especie y zona (todas seleccionadas por defecto)."""
+    species = sorted(df_raw['Tipo'].astype(str).unique()) if 'Tipo' in df_raw.columns else []
+    zones = sorted(df_raw['Poligono'].astype(str).unique()) if 'Poligono' in df_raw.columns else []
+    return species, zones
+
+
+def dataset_version(df, map_zones=None):
+    """
+    Hash del contenido del dataset (DataFrame limpio + zonas KML).
+    El hash del DataFrame se memoriza por objeto, así que sobre el mismo
+    DataFrame cacheado (que no se modifica) solo se calcula una vez.
+    """
+    key = id(df)
+    with _memo_lock:
+        memo = _version_memo.get(key)
+    if memo is not None and memo[0]() is df:
+        df_digest = memo[1]
+    else:
+        h = hashlib.sha256()
+        h.update(json.dumps([str(c) for c in df.columns]).encode('utf-8'))
+        h.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+        df_digest = h.hexdigest()
+        # La entrada se borra cuando el DataFrame se libera
+        ref = weakref.ref(df, lambda _, key=key: _forget(key))
+        with _memo_lock:
+            _version_memo[key] = (ref, df_digest)
+
+    h = hashlib.sha256(f"{SNAPSHOT_FORMAT}:{df_digest}".encode('utf-8'))
+    h.update(json.dumps(map_zones or [], sort_keys=True).encode('utf-8'))
+    return h.hexdigest()[:16]
+
+
+def _forget(key):
+    with _memo_lock:
+        entry = _version_memo.get(key)
+        if entry is not None and entry[0]() is None:
+            del _version_memo[key]
+
+
+def build_snapshot(df_raw, map_zones, version):
+    """
+    Renderiza la vista por defecto con los mismos pasos que el dashboard:
+    constructores de solex.charts, capas del mapa y parámetros ROI por
+    defecto. Con todas las opciones marcadas los filtros no quitan filas (ver
+    `etl.apply_filters`), así que se usa `df_raw` tal cual. Las figuras
+    ausentes (faltan columnas) quedan en None, igual que en vivo.
+    """
+    df = df_raw
+    figures = {
+        'sunburst': charts.build_sunburst(df),
+        'salud': charts.build_health_pie(df),
+    }
+    if charts.has_biometrics(df):
+        figures['alometria'] = charts.build_scatter(df, charts.detect_trendline())
+        figures['distribucion'] = charts.build_histogram(df)
+
+    n_plants = charts.count_productive(df)
+    if not n_plants:
+        n_plants = len(df)
+    roi = None
+    if n_plants > 0:
+        roi = charts.compute_roi(n_plants, **charts.ROI_DEFAULTS)
+        figures['roi'] = charts.build_waterfall(roi)
+
+    map_html = None
+    if charts.has_coordinates(df):
+        map_html = charts.build_map(df, map_zones, **charts.MAP_LAYER_DEFAULTS).get_root().render()
+
+    return {
+        'version': version,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'rows': len(df),
+        'kpis': charts.compute_kpis(df, map_zones),
+        'roi': roi,
+        'report': etl.report_stats(df),
+        'health_table': charts.health_summary_table(df).to_dict('records') if 'Estado_Salud' in df.columns else None,
+        'bio_stats': df[['Altura_cm', 'Diametro_cm']].describe().to_dict() if charts.has_biometrics(df) else None,
+        'figures': {name: fig.to_json() if fig is not None else None for name, fig in figures.items()},
+        'map_html': map_html,
+        'xlsx': charts.export_xlsx(df),
+    }
+
+
+def figure_from_json(fig_json):
+    """
+    Figura plotly a partir del JSON del snapshot, sin volver a validarla
+    (ya se validó al construirla); validar una nube de puntos grande cuesta
+    tanto como construirla de nuevo.
+    """
+    if fig_json is None:
+        return None
+    return go.Figure(json.loads(fig_json), _validate=False)
+
+
+def _slug(site_key):
+    return re.sub(r'[^\w.-]+', '_', str(site_key)).strip('_') or 'sitio'
+
+
+def _write_atomic(path, data):
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+class SnapshotStore:
+    """
+    Snapshots en disco, uno vigente por sitio: `<versión>.json` (KPIs, ROI y
+    figuras), `<versión>.html` (mapa) y `<versión>.xlsx` (descarga).
+    """
+
+    def __init__(self, root=DEFAULT_SNAPSHOT_DIR):
+        self.root = Path(root)
+
+    def _dir(self, site_key):
+        return self.root / _slug(site_key)
+
+    def load(self, site_key, version):
+        base = self._dir(site_key)
+        try:
+            meta = json.loads((base / f"{version}.json").read_text(encoding='utf-8'))
+            xlsx = (base / f"{version}.xlsx").read_bytes()
+            html_path = base / f"{version}.html"
+            map_html = html_path.read_text(encoding='utf-8') if meta.get('has_map') else None
+        except (OSError, ValueError):
+            return None
+        meta.pop('has_map', None)
+        return {**meta, 'map_html': map_html, 'xlsx': xlsx}
+
+    def save(self, site_key, snapshot):
+        base = self._dir(site_key)
+        base.mkdir(parents=True, exist_ok=True)
+        version = snapshot['version']
+
+        meta = {k: v for k, v in snapshot.items() if k not in ('map_html', 'xlsx')}
+        meta['has_map'] = snapshot['map_html'] is not None
+        # El .json se escribe al final: su presencia marca el snapshot como completo
+        _write_atomic(base / f"{version}.xlsx", snapshot['xlsx'])
+        if snapshot['map_html'] is not None:
+            _write_atomic(base / f"{version}.html", snapshot['map_html'].encode('utf-8'))
+        _write_atomic(base / f"{version}.json", json.dumps(meta, ensure_ascii=False).encode('utf-8'))
+
+        # Solo se conserva la versión vigente del sitio
+        for path in base.iterdir():
+            if path.suffix in ('.json', '.html', '.xlsx') and path.stem != version:
+                path.unlink(missing_ok=True)
+
+    def get_or_build(self, site_key, df_raw, map_zones, version=None):
+        """Snapshot de la versión actual; lo construye y guarda si no existe."""
+        version = version or dataset_version(df_raw, map_zones)
+        snapshot = self.load(site_key, version)
+        if snapshot is None:
+            snapshot = build_snapshot(df_raw, map_zones, version)
+            self.save(site_key, snapshot)
+        return snapshot
+
+
+_site_locks = {}
+
+
+def _site_lock(site_id):
+    with _memo_lock:
+        return _site_locks.setdefault(site_id, threading.Lock())
+
+
+def load_site_snapshot(site, cache, df_raw, map_zones, store=None, probe=None):
+    """
+    Snapshot vigente de un sitio del registro, vía el caché compartido. La
+    clave no incluye la versión: al cambiar el dataset la entrada se
+    reemplaza, así que hay una sola versión por sitio en memoria. Las sesiones
+    que llegan durante la construcción esperan al mismo snapshot.
+    """
+    version = dataset_version(df_raw, map_zones)
+    key = (site['id'], 'snapshot', site['data'])
+    snap = cache.get(key)
+    hit = snap is not None and snap['version'] == version
+    if probe is not None:
+        probe(hit)
+    if hit:
+        return snap
+
+    with _site_lock(site['id']):
+        snap = cache.peek(key)
+        if snap is None or snap['version'] != version:
+            snap = (store or SnapshotStore()).get_or_build(site['id'], df_raw, map_zones, version=version)
+            cache.put(key, snap)
+    return snap
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-renderiza la vista predeterminada de cada sitio.")
+    parser.add_argument('--sites', default=workspace.DEFAULT_REGISTRY_PATH, help="Registro de sitios (sites.json)")
+    parser.add_argument('--out', default=DEFAULT_SNAPSHOT_DIR, help="Directorio de snapshots")
+    args = parser.parse_args(argv)
+
+    registry = workspace.load_registry(args.sites)
+    cache = workspace.SiteCache(registry['memory_budget_mb'] * 1024 * 1024)
+    store = SnapshotStore(args.out)
+
+    failed = 0
+    for site in registry['sites']:
+        try:
+            df_raw = workspace.load_site_data(site, cache)
+            zones = workspace.load_site_zones(site, cache, on_warning=lambda msg: print(f"  aviso: {msg}"))
+            snapshot = store.get_or_build(site['id'], df_raw, zones)
+        except Exception as e:
+            print(f"{site['id']}: error ({e})")
+            failed += 1
+            continue
+        print(f"{site['id']}: versión {snapshot['version']} ({snapshot['rows']} registros, {snapshot['created']})")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,212 @@
+# ==============================================================================
+# GENERADOR DE PLANTACIONES SINTÉTICAS
+# ==============================================================================
+# Inventarios de N especímenes y KML de M polígonos con V vértices, con la misma
+# forma que `plantacion.xlsx` y `cerritodelcarmen.kml.txt` (incluidas las
+# cabeceras "Coordenada_X," / "Coordenada_Y." que la limpieza debe corregir).
+# Se usa para pruebas de carga y para el banco de pruebas (`solex.bench`).
+#
+#     python -m solex.synthetic --trees 50000 --polygons 40 --vertices 200 --out sintetico
+
+import argparse
+import math
+from datetime import date, timedelta
+from io import BytesIO
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+
+# Centro aproximado de Cerrito del Carmen (lat, lon)
+DEFAULT_CENTER = (21.2366, -100.4612)
+
+# Tipo, Género, Especie, prefijo de ID, peso, altura (media, sd) cm, diámetro (media, sd) cm
+SPECIES_CATALOG = [
+    ('MAGUEY', 'agave', 'salmiana', 'MAG', 0.45, 22, 6, 30, 5),
+    ('MAGUEY', 'agave', 'americana', 'MAG', 0.25, 20, 5, 28, 5),
+    ('MAGUEY', 'agave', 'cupratea', 'MAG', 0.05, 18, 5, 25, 4),
+    ('MEZQUITE', 'prosopis', 'laevigata', 'MEZ', 0.08, 60, 20, 3, 1),
+    ('NOPAL', 'opuntia', 'común', 'NOP', 0.10, 35, 10, 12, 3),
+    ('ÓRGANO', 'lophoceryus', 'marginatus', 'ORG', 0.04, 45, 15, 8, 2),
+    ('OTRA CACTÁCEA', 'ferocactus', 'latispinus', 'CAC', 0.03, 15, 5, 15, 4),
+]
+
+HEALTH_STATES = ['Excelente', 'Bueno', 'Regular', 'Estrés Hídrico', 'Plaga', 'Crítico', 'Muerto']
+HEALTH_WEIGHTS = [0.24, 0.46, 0.18, 0.05, 0.03, 0.03, 0.01]
+
+NOTES = ['', '', '', 'revisar', 'con hormiga', 'hongo', 'hijeando', 'replantar']
+
+# Columnas tal como vienen en el Excel de campo
+RAW_COLUMNS = [
+    'ID_Especimen', 'Tipo', 'Genero', 'Especie', 'Poligono', 'Coordenada_X,', 'Coordenada_Y.',
+    'Estado_Salud', 'Altura_cm', 'Diametro_cm', 'Fecha_Plantacion', 'Ultima_Observacion',
+    'Fecha_Riego', 'Fertilizacion', 'Notas'
+]
+
+
+def generate_zones(n_polygons, n_vertices, center=DEFAULT_CENTER, seed=0):
+    """
+    Polígonos cerrados en una cuadrícula alrededor de `center`, con el mismo
+    formato que `parse_kml_zones`: [{'name', 'points': [[lat, lon], ...]}].
+    """
+    rng = np.random.default_rng(seed)
+    cols = max(1, math.ceil(math.sqrt(n_polygons)))
+    step = 0.002  # ~200 m entre centros
+    radius = step * 0.4
+    n_vertices = max(3, n_vertices)
+
+    zones = []
+    for i in range(n_polygons):
+        row, col = divmod(i, cols)
+        c_lat = center[0] + (row - cols / 2) * step
+        c_lon = center[1] + (col - cols / 2) * step
+        angles = np.linspace(0, 2 * np.pi, n_vertices, endpoint=False)
+        radii = radius * rng.uniform(0.7, 1.0, n_vertices)
+        lats = c_lat + radii * np.sin(angles)
+        lons = c_lon + radii * np.cos(angles)
+        points = [[float(lat), float(lon)] for lat, lon in zip(lats, lons)]
+        points.append(points[0])  # Anillo cerrado, como Google Earth
+        zones.append({'name': f"Zona {i + 1:03d}", 'points': points})
+    return zones
+
+
+def zones_to_kml(zones, document_name="Plantación Sintética"):
+    """Serializa zonas a KML 2.2 (lon,lat,alt), como exporta Google Earth."""
+    placemarks = []
+    for zone in zones:
+        coords = ' '.join(f"{lon:.13f},{lat:.14f},2170" for lat, lon in zone['points'])
+        placemarks.append(f"""	<Placemark>
+		<name>{escape(zone['name'])}</name>
+		<Polygon>
+			<outerBoundaryIs>
+				<LinearRing>
+					<coordinates>
+						{coords}
+					</coordinates>
+				</LinearRing>
+			</outerBoundaryIs>
+		</Polygon>
+	</Placemark>""")
+    body = '\n'.join(placemarks)
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<kml xmlns="http://www.opengis.net/kml/2.2" xmlns:gx="http://www.google.com/kml/ext/2.2">
+<Document>
+	<name>{escape(document_name)}</name>
+{body}
+</Document>
+</kml>
+""".encode('utf-8')
+
+
+def generate_inventory(n_trees, zones, seed=0):
+    """
+    Inventario de `n_trees` especímenes repartidos en `zones`, con columnas y
+    tipos iguales a los del Excel de campo (antes de `clean_dataframe`).
+    """
+    rng = np.random.default_rng(seed)
+
+    weights = np.array([s[4] for s in SPECIES_CATALOG])
+    species_idx = rng.choice(len(SPECIES_CATALOG), size=n_trees, p=weights / weights.sum())
+    catalog = pd.DataFrame(
+        SPECIES_CATALOG,
+        columns=['Tipo', 'Genero', 'Especie', 'Prefijo', 'Peso', 'H_mu', 'H_sd', 'D_mu', 'D_sd']
+    ).iloc[species_idx].reset_index(drop=True)
+
+    health = rng.choice(HEALTH_STATES, size=n_trees, p=HEALTH_WEIGHTS)
+
+    # Los especímenes en mal estado crecen menos
+    vigor = np.where(np.isin(health, ['Crítico', 'Muerto']), 0.6,
+                     np.where(np.isin(health, ['Regular', 'Estrés Hídrico', 'Plaga']), 0.85, 1.0))
+    height = np.clip(rng.normal(catalog['H_mu'], catalog['H_sd']) * vigor, 3, None).round()
+    diameter = np.clip(rng.normal(catalog['D_mu'], catalog['D_sd']) * vigor, 1, None).round()
+
+    # Ubicación: dentro del círculo inscrito de una zona al azar
+    if zones:
+        zone_idx = rng.integers(0, len(zones), size=n_trees)
+        centers = np.array([np.mean(z['points'][:-1], axis=0) for z in zones])
+        zone_names = np.array([z['name'] for z in zones])
+        poligono = zone_names[zone_idx]
+        base = centers[zone_idx]
+        spread = 0.0005
+    else:
+        poligono = np.full(n_trees, 'Sin Zona')
+        base = np.tile(DEFAULT_CENTER, (n_trees, 1))
+        spread = 0.001
+    r = spread * np.sqrt(rng.uniform(0, 1, n_trees))
+    theta = rng.uniform(0, 2 * np.pi, n_trees)
+    lat = base[:, 0] + r * np.sin(theta)
+    lon = base[:, 1] + r * np.cos(theta)
+
+    planted = date(2025, 1, 1)
+    plant_offsets = rng.integers(0, 365, n_trees)
+    fecha_plantacion = pd.to_datetime([planted + timedelta(days=int(d)) for d in plant_offsets])
+    observed = (fecha_plantacion + pd.to_timedelta(rng.integers(7, 120, n_trees), unit='D')).strftime('%d/%m/%Y')
+
+    ids = [f"{p}{i + 1:06d}" for i, p in enumerate(catalog['Prefijo'])]
+
+    return pd.DataFrame({
+        'ID_Especimen': ids,
+        'Tipo': catalog['Tipo'],
+        'Genero': catalog['Genero'],
+        'Especie': catalog['Especie'],
+        'Poligono': poligono,
+        'Coordenada_X,': lat.round(6),
+        'Coordenada_Y.': lon.round(6),
+        'Estado_Salud': health,
+        'Altura_cm': height.astype(int),
+        'Diametro_cm': diameter.astype(int),
+        'Fecha_Plantacion': fecha_plantacion,
+        'Ultima_Observacion': observed,
+        'Fecha_Riego': np.nan,
+        'Fertilizacion': np.nan,
+        'Notas': rng.choice(NOTES, size=n_trees),
+    }, columns=RAW_COLUMNS)
+
+
+def inventory_to_xlsx(df, n_sheets=1):
+    """
+    Excel en memoria (bytes). Con `n_sheets` > 1 los polígonos se reparten entre
+    varias hojas ("Hoja1", "Hoja2", ...), como los libros con una hoja por zona.
+    """
+    buffer = BytesIO()
+    with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
+        if n_sheets <= 1:
+            df.to_excel(writer, index=False, sheet_name='Hoja1')
+        else:
+            zones = sorted(df['Poligono'].unique())
+            sheet_of_zone = {zone: i % n_sheets for i, zone in enumerate(zones)}
+            for k, chunk in df.groupby(df['Poligono'].map(sheet_of_zone)):
+                chunk.to_excel(writer, index=False, sheet_name=f"Hoja{k + 1}")
+    return buffer.getvalue()
+
+
+def generate_site(out_dir, n_trees, n_polygons, n_vertices, seed=0):
+    """Escribe `plantacion.xlsx` y `zonas.kml` sintéticos en `out_dir`."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    zones = generate_zones(n_polygons, n_vertices, seed=seed)
+    df = generate_inventory(n_trees, zones, seed=seed)
+    workbook = out_dir / 'plantacion.xlsx'
+    kml = out_dir / 'zonas.kml'
+    workbook.write_bytes(inventory_to_xlsx(df))
+    kml.write_bytes(zones_to_kml(zones))
+    return workbook, kml
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera una plantación sintética (Excel + KML).")
+    parser.add_argument('--trees', type=int, default=10000, help="Número de especímenes (N)")
+    parser.add_argument('--polygons', type=int, default=20, help="Número de polígonos (M)")
+    parser.add_argument('--vertices', type=int, default=50, help="Vértices por polígono (V)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='sintetico', help="Directorio de salida")
+    args = parser.parse_args(argv)
+
+    workbook, kml = generate_site(args.out, args.trees, args.polygons, args.vertices, seed=args.seed)
+    print(f"{workbook} ({args.trees} especímenes)")
+    print(f"{kml} ({args.polygons} polígonos x {args.vertices} vértices)")
+
+
+if __name__ == '__main__':
+    main()
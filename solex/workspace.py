@@ -0,0 +1,324 @@
+# ==============================================================================
+# ESPACIO DE TRABAJO MULTI-SITIO
+# ==============================================================================
+# Registro de plantaciones (sites.json), caché LRU con presupuesto de memoria
+# global compartido entre sitios y agregados por sitio para la vista resumen.
+#
+# Formato de sites.json:
+#
+#     {
+#       "memory_budget_mb": 512,
+#       "sites": [
+#         {"id": "cerrito", "name": "Cerrito del Carmen",
+#          "data": "https://.../plantacion.xlsx", "kml": "https://.../zonas.kml"}
+#       ]
+#     }
+#
+# `data` y `kml` aceptan URL (http/https) o rutas locales relativas al archivo.
+# Opcionales por sitio: "sheets" ("all" o lista de hojas a unir, p. ej. una por
+# zona) y "columns" (solo esas columnas); ver solex.excel.
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import pandas as pd
+
+from solex import etl
+
+URL_GITHUB_EXCEL = "https://raw.githubusercontent.com/ponsmartinluis-hub/reforestacion-pons/main/plantacion.xlsx"
+URL_GITHUB_KML = "https://raw.githubusercontent.com/ponsmartinluis-hub/reforestacion-pons/main/cerritodelcarmen.kml.txt"
+
+DEFAULT_REGISTRY_PATH = os.environ.get("SOLEX_SITES", Path(__file__).resolve().parent.parent / "sites.json")
+DEFAULT_MEMORY_BUDGET_MB = 512
+
+# Mismo TTL que tenían los loaders de Streamlit (datos 5 min, KML 10 min)
+DATA_TTL = 300
+KML_TTL = 600
+
+DEFAULT_REGISTRY = {
+    'memory_budget_mb': DEFAULT_MEMORY_BUDGET_MB,
+    'sites': [
+        {'id': 'cerrito', 'name': 'Cerrito del Carmen', 'data': URL_GITHUB_EXCEL, 'kml': URL_GITHUB_KML},
+    ],
+}
+
+
+def is_url(source):
+    return str(source).startswith(('http://', 'https://'))
+
+
+def load_registry(path=DEFAULT_REGISTRY_PATH):
+    """
+    Lee el registro de sitios. Si el archivo no existe se usa el sitio
+    histórico (Cerrito del Carmen en GitHub).
+    """
+    path = Path(path)
+    if not path.exists():
+        return DEFAULT_REGISTRY
+
+    with open(path, encoding='utf-8') as fh:
+        registry = json.load(fh)
+
+    base = path.resolve().parent
+    sites = []
+    for entry in registry.get('sites', []):
+        if not entry.get('id') or not entry.get('data'):
+            raise ValueError(f"Sitio inválido en {path}: se requieren 'id' y 'data' ({entry})")
+        site = dict(entry)
+        site.setdefault('name', site['id'])
+        # Rutas locales relativas al propio sites.json
+        for key in ('data', 'kml'):
+            if site.get(key) and not is_url(site[key]):
+                site[key] = str(base / site[key])
+        sites.append(site)
+
+    ids = [s['id'] for s in sites]
+    if len(ids) != len(set(ids)):
+        raise ValueError(f"IDs de sitio duplicados en {path}")
+
+    return {
+        'memory_budget_mb': registry.get('memory_budget_mb', DEFAULT_MEMORY_BUDGET_MB),
+        'sites': sites,
+    }
+
+
+def estimate_nbytes(value):
+    """Estimación del tamaño en memoria de un valor cacheado."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, list):
+        # Zonas KML: ~120 bytes por punto [lat, lon] + cabecera por zona
+        return sum(200 + 120 * len(z.get('points', [])) for z in value if isinstance(z, dict))
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, dict):
+        # Agregados y snapshots (HTML del mapa, JSON de figuras, bytes del .xlsx)
+        return 1024 + sum(estimate_nbytes(v) for v in value.values() if isinstance(v, (str, bytes, dict)))
+    return 1024
+
+
+class SiteCache:
+    """
+    Caché LRU compartido por todos los sitios, con un presupuesto de memoria
+    global. Las claves son (site_id, tipo, origen), de modo que cada sitio queda
+    aislado pero compite por el mismo presupuesto: al excederlo se expulsan las
+    entradas usadas menos recientemente, sea cual sea su sitio.
+    """
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self._entries = OrderedDict()  # key -> (value, nbytes, expires_at)
+        self._lock = threading.Lock()
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, nbytes, expires_at = entry
+            if expires_at is not None and time.monotonic() > expires_at:
+                self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key):
+        """Valor vigente sin alterar el orden LRU ni los contadores; None si no está."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, _, expires_at = entry
+        if expires_at is not None and time.monotonic() > expires_at:
+            return None
+        return value
+
+    def put(self, key, value, ttl=None):
+        nbytes = estimate_nbytes(value)
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, nbytes, expires_at)
+            self.used_bytes += nbytes
+            # Nunca se expulsa la entrada recién insertada, aunque sola exceda el presupuesto
+            while self.used_bytes > self.budget_bytes and len(self._entries) > 1:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def get_or_load(self, key, loader, ttl=None, probe=None):
+        """`probe(hit)` opcional para instrumentación (ver solex.instrument)."""
+        value = self.get(key)
+        if probe is not None:
+            probe(value is not None)
+        if value is None:
+            value = loader()
+            if value is not None:
+                self.put(key, value, ttl=ttl)
+        return value
+
+    def invalidate_site(self, site_id):
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == site_id]:
+                self._drop(key)
+
+    def _drop(self, key):
+        _, nbytes, _ = self._entries.pop(key)
+        self.used_bytes -= nbytes
+
+    def stats(self):
+        with self._lock:
+            per_site = {}
+            for (site_id, _, _), (_, nbytes, _) in self._entries.items():
+                per_site[site_id] = per_site.get(site_id, 0) + nbytes
+            return {
+                'entries': len(self._entries),
+                'used_bytes': self.used_bytes,
+                'budget_bytes': self.budget_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'per_site_bytes': per_site,
+            }
+
+
+def _data_key(site):
+    return (site['id'], 'data', site['data'])
+
+
+def _kml_key(site):
+    return (site['id'], 'kml', site['kml'])
+
+
+def _read_site_data(site, stage=None):
+    return etl.load_data_engine(
+        site['data'], is_url=is_url(site['data']), stage=stage,
+        columns=site.get('columns'), sheets=site.get('sheets'),
+    )
+
+
+def _read_site_zones(site, on_warning=None, stage=None):
+    stage = stage or etl.no_stage
+    with stage('descarga_kml'):
+        if is_url(site['kml']):
+            kml_bytes = etl.fetch_bytes(site['kml'])
+        else:
+            kml_bytes = open(site['kml'], 'rb')
+    with kml_bytes, stage('parseo_kml'):
+        return etl.parse_kml_zones(kml_bytes, on_warning=on_warning)
+
+
+def load_site_data(site, cache, probe=None, stage=None):
+    """DataFrame limpio del sitio, vía el caché compartido."""
+    return cache.get_or_load(
+        _data_key(site), lambda: _read_site_data(site, stage), ttl=DATA_TTL, probe=probe,
+    )
+
+
+def load_site_zones(site, cache, on_warning=None, probe=None, stage=None):
+    """Zonas KML del sitio, vía el caché compartido. [] si no tiene KML."""
+    if not site.get('kml'):
+        return []
+    return cache.get_or_load(
+        _kml_key(site), lambda: _read_site_zones(site, on_warning, stage), ttl=KML_TTL, probe=probe,
+    )
+
+
+# --- AGREGADOS PARA LA VISTA RESUMEN ---
+
+def site_aggregates(df, map_zones=None):
+    """
+    Agregados aditivos de un sitio: sumas y conteos que se pueden combinar
+    entre sitios sin volver a tocar los DataFrames crudos.
+    """
+    agg = {
+        'total_trees': len(df),
+        'good_health': 0,
+        'height_sum': 0.0,
+        'height_count': 0,
+        'n_zones': len(map_zones) if map_zones else 0,
+        'health_counts': {},
+        'species_counts': {},
+    }
+    if 'Estado_Salud' in df.columns:
+        agg['good_health'] = int(df['Estado_Salud'].str.contains('Excelente|Bueno', case=False, na=False).sum())
+        agg['health_counts'] = {str(k): int(v) for k, v in df['Estado_Salud'].value_counts().items()}
+    if 'Altura_cm' in df.columns:
+        agg['height_sum'] = float(df['Altura_cm'].sum())
+        agg['height_count'] = int(df['Altura_cm'].count())
+    if 'Tipo' in df.columns:
+        agg['species_counts'] = {str(k): int(v) for k, v in df['Tipo'].value_counts().items()}
+    return agg
+
+
+def load_site_aggregates(site, cache, on_warning=None, probe=None):
+    """
+    Agregados del sitio, cacheados aparte de los datos crudos (son diminutos).
+    Si los datos o las zonas del sitio ya están en caché se reutilizan; si no,
+    se leen sin insertarlos, para que abrir el resumen de muchos sitios no
+    expulse los datos del sitio activo.
+    """
+    def _load():
+        df = cache.peek(_data_key(site))
+        if df is None:
+            df = _read_site_data(site)
+        if df is None:
+            return None
+        zones = []
+        if site.get('kml'):
+            zones = cache.peek(_kml_key(site))
+            if zones is None:
+                zones = _read_site_zones(site, on_warning)
+        return site_aggregates(df, zones)
+
+    return cache.get_or_load((site['id'], 'agg', site['data']), _load, ttl=DATA_TTL, probe=probe)
+
+
+def combine_aggregates(aggs_by_site):
+    """
+    Tabla por sitio y totales globales a partir de `site_aggregates`.
+    Los promedios globales se ponderan con las sumas y conteos de cada sitio.
+    """
+    rows = []
+    totals = {'total_trees': 0, 'good_health': 0, 'height_sum': 0.0, 'height_count': 0, 'n_zones': 0}
+    health_counts = {}
+    species_counts = {}
+
+    for name, agg in aggs_by_site.items():
+        total = agg['total_trees']
+        rows.append({
+            'Sitio': name,
+            'Inventario': total,
+            'Supervivencia_%': (agg['good_health'] / total * 100) if total else 0.0,
+            'Altura_Promedio_cm': (agg['height_sum'] / agg['height_count']) if agg['height_count'] else 0.0,
+            'Zonas': agg['n_zones'],
+            'Especies': len(agg['species_counts']),
+        })
+        for key in totals:
+            totals[key] += agg[key]
+        for k, v in agg['health_counts'].items():
+            health_counts[k] = health_counts.get(k, 0) + v
+        for k, v in agg['species_counts'].items():
+            species_counts[k] = species_counts.get(k, 0) + v
+
+    total = totals['total_trees']
+    kpis = {
+        'total_trees': total,
+        'salud_pct': (totals['good_health'] / total * 100) if total else 0.0,
+        'avg_height': (totals['height_sum'] / totals['height_count']) if totals['height_count'] else 0.0,
+        'n_zones': totals['n_zones'],
+        'n_species': len(species_counts),
+    }
+    return pd.DataFrame(rows), kpis, health_counts
@@ -0,0 +1,127 @@
+# Paridad del lector rápido (solex.excel) con `pd.read_excel` en hojas con
+# los casos que el libro de ejemplo no tiene: filas en blanco intermedias,
+# valores bajo cabeceras vacías, hojas solo con cabecera, errores de Excel...
+
+from io import BytesIO
+
+import openpyxl
+import pandas as pd
+import pytest
+
+from solex import etl
+from solex import excel
+
+ENGINES = ['openpyxl'] + (['calamine'] if excel.has_calamine() else [])
+
+SHEETS = {
+    'fila_en_blanco_y_columna_sin_cabecera': [
+        ['ID', 'Tipo', 'Coordenada_X,', 'Altura_cm', 'Notas'],
+        [1, 'MAGUEY', 21.5, 20, None, 'extra'],
+        [],
+        [3, 'NOPAL', None, None, None, None],
+        [],
+        [5, 'MEZQUITE', 21.25, 2.0, None, 7],
+    ],
+    'solo_cabecera': [['ID', 'Tipo', 'Altura_cm']],
+    'hoja_vacia': [],
+    'filas_en_blanco_al_final': [['A', 'B'], [1, 2], [], []],
+    'filas_en_blanco_tras_cabecera': [['A', 'B'], [], [], [1, 2]],
+    'cabeceras_vacias_y_repetidas': [['A', None, 'A', 'B'], [1, 2, 3, 4], [5, None, 7, 8]],
+    'columna_vacia': [['A', None, 'C'], [1, None, 3], [4, None, 6]],
+    'fechas_booleanos_y_texto_numerico': [
+        ['Fecha', 'Activo', 'Codigo'],
+        [pd.Timestamp('2025-01-02'), True, '1'],
+        [None, False, '2'],
+    ],
+}
+
+
+def _workbook(rows):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    for r, row in enumerate(rows, 1):
+        for c, value in enumerate(row, 1):
+            if value is not None:
+                ws.cell(r, c, value)
+    buffer = BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def _usecols(columns):
+    return lambda name: excel.normalize_header(name) in set(columns)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('name', list(SHEETS))
+def test_read_sheet_matches_read_excel(name, engine):
+    data = _workbook(SHEETS[name])
+    expected = pd.read_excel(BytesIO(data))
+    pd.testing.assert_frame_equal(excel.read_sheet(data, engine=engine), expected)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_column_projection_matches_usecols(engine):
+    data = _workbook(SHEETS['fila_en_blanco_y_columna_sin_cabecera'])
+    columns = ['ID', 'Coordenada_X', 'Notas']
+    expected = pd.read_excel(BytesIO(data), usecols=_usecols(columns))
+    pd.testing.assert_frame_equal(excel.read_sheet(data, columns=columns, engine=engine), expected)
+
+
+def test_excel_error_cells_are_nan():
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(['A', 'B'])
+    ws.append([1, None])
+    ws.append([2, 'x'])
+    ws['B2'].value = '#DIV/0!'
+    ws['B2'].data_type = 'e'
+    buffer = BytesIO()
+    wb.save(buffer)
+    data = buffer.getvalue()
+
+    pd.testing.assert_frame_equal(excel.read_sheet(data, engine='openpyxl'), pd.read_excel(BytesIO(data)))
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_multi_sheet_read_matches_concat(engine):
+    # Hoja1 escribe "Coordenada_X," y Hoja3 "Coordenada_X:": al unir deben
+    # quedar en la misma columna, como tras `clean_dataframe`
+    books = {
+        'Hoja1': SHEETS['fila_en_blanco_y_columna_sin_cabecera'][:4],
+        'Hoja2': SHEETS['filas_en_blanco_al_final'],
+        'Hoja3': [['ID', 'Tipo', 'Coordenada_X:', 'Altura_cm.'], [7, 'NOPAL', 21.75, 15]],
+    }
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    for sheet, rows in books.items():
+        ws = wb.create_sheet(sheet)
+        for row in rows:
+            ws.append(row)
+    buffer = BytesIO()
+    wb.save(buffer)
+    data = buffer.getvalue()
+
+    frames = pd.read_excel(BytesIO(data), sheet_name=None)
+    for sheet, df in frames.items():
+        df.columns = [excel.normalize_header(c) for c in df.columns]
+        df[excel.SHEET_COLUMN] = sheet
+    expected = pd.concat(frames.values(), ignore_index=True)
+    assert list(expected.columns).count('Coordenada_X') == 1
+
+    got = excel.read_workbook(BytesIO(data), sheets='all', engine=engine, max_workers=1)
+    pd.testing.assert_frame_equal(got, expected)
+
+
+def test_multi_sheet_headers_keep_all_rows():
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    for sheet, header in (('Zona1', 'Coordenada_X,'), ('Zona2', 'Coordenada_X')):
+        ws = wb.create_sheet(sheet)
+        ws.append(['ID', header])
+        ws.append([sheet, 21.5])
+    buffer = BytesIO()
+    wb.save(buffer)
+
+    df = etl.load_data_engine(BytesIO(buffer.getvalue()), sheets='all')
+    assert list(df['ID']) == ['Zona1', 'Zona2']